@@ -59,7 +59,7 @@ def target(shared, pargs):
         if not success1:
             continue
 
-        shared.frame[:] = frame  # latest frame copied to shared frame
+        shared.frame_pyramid.write(frame)  # latest frame converted to rgb and shared
 
         if shared.n_observed_faces.value > 0:
             bbox.coords = shared.bbox_coords[0]
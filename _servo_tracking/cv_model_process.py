@@ -27,11 +27,21 @@ def target(shared_data_object, args):
 
     shared = shared_data_object
     model_timer = timers.TimeSinceLast()
+    frame = np.zeros(shared.frame_pyramid.level(1).dim, dtype='uint8')
+    last_frame_number = 0
     model_timer()
     while True:
-        # compress and convert from
-
-        frame = cv2.cvtColor(shared.frame, cv2.COLOR_BGR2RGB)
+        # sleep until there's a new frame instead of rerunning the model on the same one
+        if shared.frame_pyramid.wait(last_frame_number, timeout=.5) <= last_frame_number:
+            # no new frames, the camera process may have quit
+            if shared.new_keyboard_input.value is True and shared.keyboard_input.value == ord('q'):
+                break
+            continue
+        # already rgb from the camera process
+        frame_number, frame = shared.frame_pyramid.read(1, out=frame)
+        if frame_number == 0:
+            continue
+        last_frame_number = frame_number
         results = face_detection.process(frame)
 
         if results.detections:
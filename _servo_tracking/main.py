@@ -50,7 +50,9 @@ def main():
     shared_data_object.add_array('key_input_received', 'i', 0)
 
     # add shared arrays
-    shared_data_object.add_array('frame', ctypes.c_uint8, (pargs.f_dim[1], pargs.f_dim[0], 3)) # dims are backwards
+    # rgb copy of the frame, converted once in the camera process
+    shared_data_object.add_frame_pyramid('frame_pyramid', ctypes.c_uint8, (pargs.f_dim[1], pargs.f_dim[0], 3), # dims are backwards
+                                         scales=(1,))
     shared_data_object.add_array('bbox_coords', ctypes.c_int64, (pargs.faces, 4))
     shared_data_object.add_array('error', ctypes.c_double, 2)
     shared_data_object.add_array('observed_names', ctypes.c_uint8, pargs.faces)
@@ -102,7 +102,7 @@ def main():
                                      show_hitbox=True,
                                      )
 
-    mover_manager = assetholders.CollidingAssetManager(collisions=True, move_before_delete=100)
+    mover_manager = assetholders.CollidingAssetManager(collisions=True)
     mover.name = '0'
     mover1.name = '1'
     mover2.name = '2'
@@ -0,0 +1,97 @@
+"""
+sanity checks for the circle collisions. a few hundred circles bounce around an ArrayAssetManager with no gravity
+and perfectly bouncy borders, so the total kinetic energy shouldn't grow, with or without continuous collisions.
+then a pair of fast circles meet head on in both managers with continuous collisions, and they have to turn around
+when they touch, not before. no camera needed
+"""
+import numpy as np
+
+from otis.helpers import maths
+from otis.overlay import shapes, assetholders
+
+
+def make_manager(n_circles=200, continuous=False, dim=(1280, 720), seed=0):
+    rng = np.random.default_rng(seed)
+    manager = assetholders.ArrayAssetManager(dim=dim, collisions=True, fixed_step=1 / 60, continuous=continuous)
+
+    placed = []
+    while len(placed) < n_circles:
+        radius = rng.uniform(8, 16)
+        center = rng.uniform((30, 30), (dim[0] - 30, dim[1] - 30))
+        if all(np.hypot(*(center - c)) > radius + r + 2 for c, r in placed):
+            placed.append((center, radius))
+
+    for center, radius in placed:
+        manager.append(assetholders.AssetMover(shapes.Circle(center=(0, 0), radius=radius, color='r'),
+                                               center=tuple(center),
+                                               velocity=tuple(rng.uniform(-400, 400, 2)),
+                                               velocity_format='xy',
+                                               dim=dim,
+                                               continuous=continuous,
+                                               fixed_step=1 / 60,
+                                               ))
+    return manager
+
+
+def check_head_on(manager_type, speed=3000, radius=10, dim=(1280, 720), tolerance=1e-6):
+    """
+    two circles closing at 2 * speed px/s, far too fast for a discrete check. works out where they touched from the
+    time of impact and the positions after the step they bounced in, and checks they were radius * 2 apart then
+
+    Returns:
+        the distance between their centers when they touched
+    """
+    dt = 1 / 60
+    manager = manager_type(dim=dim, collisions=True, fixed_step=dt, continuous=True)
+    for x, v in ((dim[0] / 2 - 340, speed), (dim[0] / 2 + 340, -speed)):
+        manager.append(assetholders.AssetMover(shapes.Circle(center=(0, 0), radius=radius, color='r'),
+                                               center=(x, dim[1] / 2),
+                                               velocity=(v, 0),
+                                               velocity_format='xy',
+                                               dim=dim,
+                                               continuous=True,
+                                               fixed_step=dt,
+                                               ))
+    m0, m1 = manager.movers
+
+    for _ in range(30):
+        centers = m0.center.copy(), m1.center.copy()
+        velocities = m0.velocity.copy(), m1.velocity.copy()
+        t = maths.circle_time_of_impact(centers[1] - centers[0], velocities[1] - velocities[0], 2 * radius, dt)
+        manager.update_velocities()
+        manager.move()
+        if t is None:
+            continue
+
+        assert m0.velocity[0] < 0 < m1.velocity[0], 'they should have bounced'
+        # back up from the end of the step to the moment they touched
+        contact_0 = m0.center - m0.velocity * (dt - t)
+        contact_1 = m1.center - m1.velocity * (dt - t)
+        contact_distance = np.hypot(*(contact_1 - contact_0))
+        assert abs(contact_distance - 2 * radius) < tolerance, f'turned around {contact_distance:.1f} px apart'
+        return contact_distance
+
+    raise AssertionError('the circles never met')
+
+
+def main(n_steps=120, tolerance=1e-9):
+    for manager_type in (assetholders.CollidingAssetManager, assetholders.ArrayAssetManager):
+        contact_distance = check_head_on(manager_type)
+        print(f'{manager_type.__name__}: head on contact at {contact_distance:.3f} px')
+
+    for continuous in (False, True):
+        manager = make_manager(continuous=continuous)
+        energy_0 = manager.kinetic_energy()
+        peak = energy_0
+        for _ in range(n_steps):
+            manager.update_velocities()
+            manager.move()
+            peak = max(peak, manager.kinetic_energy())
+
+        change = peak / energy_0 - 1
+        print(f'continuous={continuous}: peak kinetic energy change {100 * change:+.6f}%')
+        assert change <= tolerance, 'kinetic energy went up'
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,7 @@ import cv2
 import numpy as np
 
 from otis.helpers import multitools, cvtools, coordtools, colortools, timers
-from otis.overlay import scenes, imageassets, assetholders, textwriters, shapes
+from otis.overlay import scenes, imageassets, assetholders, textwriters, shapes, compositor
 
 MAX_KEY_INPUTS_PER_SECOND = 10
 STOP_AFTER_OTIS = True
@@ -35,7 +35,7 @@ def target(shared, pargs):
     pargs.record_to = 'keith_meets_otis_15_pauses.mov'
     ####################################### SETUP #####################################################################
 
-    manager = scenes.SceneManager(shared, pargs, file=__file__)
+    manager = scenes.SceneManager(shared, pargs, file=__file__, buffered=True)
     capture = manager.capture  # for convenience
     # setup bounding manager
     color_cycle = colortools.ColorCycle()  # so boxes have different colors
@@ -164,7 +164,8 @@ def target(shared, pargs):
         ############################### ##graphics ####################################################################
 
         _, frame = capture.read()
-        shared.frame[:] = frame  # latest frame copied to shared frame
+        shared.frame.write(frame)  # latest frame copied to the shared frame ring
+        shared.frame_pyramid.write(frame)  # and the downscaled rgb copies for the model
 
         box_manager.update_boxes()  # load data from model process and update box name locations
         box_manager.update_primary()  # choose primary target for servo process
@@ -320,6 +321,11 @@ class BallSprinkler:
                                                  cycle_t=self.cycle_time
                                                  )
 
+        # balls of the same size share one resize of the frame portion per frame
+        self.resize_memo = imageassets.ResizeMemo()
+        # and all of them get drawn in one batch
+        self.compositor = compositor.SpriteCompositor()
+
         # this function creates new bouncers
         def make_new_mover_function():
             if self.random_ball_sizes is True:
@@ -334,36 +340,41 @@ class BallSprinkler:
                                                 use_mask=True,
                                                 border=True,
                                                 b_color='b',
-                                                b_thickness=1
+                                                b_thickness=1,
+                                                resize_memo=self.resize_memo,
                                                 )
 
             # can be used to have the ball origins move around the entire screen instead of just the top
             # side_pi = [np.pi / 4, 3 / 4 * np.pi, 5 / 4 * np.pi, 7 / 4 * np.pi]
             # ball_origin = self.rectangle_counter()
             # side = self.rectangle_counter.side
+            # center and velocity get set by the pool when the mover is spawned
             mover = assetholders.AssetMover(image_ball,
-                               center=(self.x_value_counter(), 50),
+                               center=(0, 50),
                                # center = ball_origin,
-                               velocity=(np.random.randint(*self.mover_velocity_magnitude),
-                                         np.random.rand() * np.pi / 2 + np.pi / 4
-                                         ),
-                               # np.random.rand() * np.pi/2+ np.pi/4 - side*np.pi/2),
+                               velocity=(0, 0),
                                dim=self.capture.f_dim,
                                ups=self.capture.max_fps,
                                border_collision=True,
                                gravity=self.gravity,
                                dampen=self.dampen,
-                               y_range=(0, 900)
-
+                               y_range=(0, 900),
+                               copy_asset=False,  # image_ball is brand new, no need to copy it
                                )
             return mover
 
         #
         self.make_new_mover_function = make_new_mover_function
         # controls the movement of the balls
-        self.movement_manager = assetholders.CollidingAssetManager(collisions=self.ball_collision,
-                                                                   max_movers=self.n_bouncers,
-                                                                   buffer=self.ball_buffer)
+        self.movement_manager = assetholders.ArrayAssetManager(collisions=self.ball_collision,
+                                                               max_movers=self.n_bouncers,
+                                                               buffer=self.ball_buffer,
+                                                               fixed_step=1 / self.capture.max_fps,
+                                                               continuous=True)
+        # build all the bouncers up front and recycle finished ones instead of making new ones mid scene
+        self.mover_pool = assetholders.MoverPool(make_new_mover_function,
+                                                 manager=self.movement_manager,
+                                                 size=self.n_bouncers + 1)
 
         #### BIG BALLS moving around the border of the screen ########################################################
         ################# currently not in use ########################################################################
@@ -406,25 +417,25 @@ class BallSprinkler:
 
         # make new bouncers
         if self.new_ball_timer() is True:  # and len(self.rectangle_counters) >-1:  # and manager.n_points < n_bouncers:
-            ball = self.make_new_mover_function()
-            movement_manager.movers.append(ball)
-
-        # update velocities / check for collisions between bouncers
-        movement_manager.update_velocities()
-        # check collisions with bounding boxes
-        if target is not None:
-            for mover in movement_manager.movers:
-                movement_manager.detector.collide(target, mover, buffer=self.circle_buffer)
-        # move the bouncies
-        movement_manager.move()
+            ball = self.mover_pool.acquire(center=(self.x_value_counter(), 50),
+                                           velocity=(np.random.randint(*self.mover_velocity_magnitude),
+                                                     np.random.rand() * np.pi / 2 + np.pi / 4
+                                                     )
+                                           )
+            movement_manager.append(ball)
+
+        # update velocities / check for collisions between bouncers and with the bounding box, then move them.
+        # runs at a fixed rate no matter how long the frame took
+        obstacles = () if target is None else (target,)
+        movement_manager.step(obstacles=obstacles, buffer=self.circle_buffer)
         # sometimes the frame portion bugs out when there isn't a clear pic, it won't have an x or y dimension
         if self.frame_portion is not None:
             if len(self.rectangle_counters) > 0:
                 self.big_ball.image = new_frame_portion
             # small_frame_portion = cv2.resize(new_frame_portion, (self.ball_diameter, self.ball_diameter))
             # set new frame portion to movers
-            for mover in movement_manager.movers:
-                mover.asset.write(frame, self.frame_portion)
+            self.resize_memo.new_frame()
+            movement_manager.composite(frame, self.compositor, image=self.frame_portion)
 
             lrc = len(self.rectangle_counters)
 
@@ -54,16 +54,42 @@ def target(shared_data_object, args):
         x = name_dict[name]
 
     model_timer = timers.TimeSinceLast()
-    frame_copy = np.zeros((args.crop_to[1], args.crop_to[0], 3), dtype='uint8')
+    rgb_frame = np.zeros((args.crop_to[1], args.crop_to[0], 3), dtype='uint8')
+    # use the camera process's downscaled frames if they were published at our compression factor
+    use_pyramid = (1 / args.cf) in shared.frame_pyramid.scales
+    if use_pyramid is True:
+        small_frames = shared.frame_pyramid.level(1 / args.cf)
+        compressed_frame = np.zeros(small_frames.dim, dtype='uint8')
     face_distances = np.zeros((n_known_faces)*(max_faces), dtype=float).reshape((max_faces, n_known_faces))
     face_distances[:, -1] = MAX_FACE_DISTANCE
 
+    # the camera process writes the pyramid after the full frame, so when we read both wait on the pyramid. waking on
+    # the full frame would catch the camera between the two writes and spin until the pyramid caught up
+    new_frames = shared.frame_pyramid if use_pyramid is True else shared.frame
+    last_frame_number = 0
     model_timer()
     while True:
+        # sleep until there's a frame we haven't looked at yet instead of rerunning the model on the same one
+        if new_frames.wait(last_frame_number, timeout=.5) <= last_frame_number:
+            # no new frames, the camera process may have quit
+            if shared.new_keyboard_input.value is True and shared.keyboard_input.value == ord('q'):
+                break
+            continue
         # compress and convert from
-        frame_copy[:,:,:] = np.array(shared.frame)
-        frame_copy = frame_copy[:,:,::-1]
-        compressed_frame = cvtools.resize(frame_copy, 1 / args.cf)
+        # zero-copy view of the latest frame, converted straight into rgb_frame
+        frame_number, frame = shared.frame.view()
+        if frame is None:
+            continue
+        if use_pyramid is True:
+            small_frame_number, compressed_frame = small_frames.read(out=compressed_frame)
+            if small_frame_number != frame_number:  # caught the camera between writes
+                continue
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+        if shared.frame.is_valid(frame_number) is False:  # camera lapped us while converting
+            continue
+        if use_pyramid is False:
+            compressed_frame = cvtools.resize(rgb_frame, 1 / args.cf)
+        last_frame_number = frame_number
 
         if platform.system() == 'Darwin':
             observed_boxes = face_locator(compressed_frame)
@@ -71,7 +97,7 @@ def target(shared_data_object, args):
             observed_boxes = face_locator(compressed_frame, model=model)
 
         observed_boxes = np.array(observed_boxes) * args.cf
-        observed_encodings = face_recognition.face_encodings(frame_copy, observed_boxes,)
+        observed_encodings = face_recognition.face_encodings(rgb_frame, observed_boxes,)
         shared.n_observed_faces.value = len(observed_boxes)
 
         for i in range(shared.n_observed_faces.value):
@@ -94,6 +120,7 @@ def target(shared_data_object, args):
 
         shared.model_update_time.value = model_timer()
         shared.new_overlay.value = True # tell other process about new data
+        shared.model_update.publish()
 
         if shared.new_keyboard_input.value is True:
             key_board_input = shared_data_object.keyboard_input.value
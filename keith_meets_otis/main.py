@@ -51,9 +51,16 @@ def main():
     shared_data_object.add_value('new_keyboard_input', ctypes.c_bool, False)
     shared_data_object.add_value('servo_tracking', ctypes.c_bool, False)
     shared_data_object.add_value('key_input_received', 'i', 0)
+    # lets the other processes sleep until the model has something new
+    shared_data_object.add_sequence_event('model_update')
 
     # add shared arrays
-    shared_data_object.add_array('frame', ctypes.c_uint8, (pargs.crop_to[1], pargs.crop_to[0], 3)) # dims are backwards
+    shared_data_object.add_frame_ring('frame', ctypes.c_uint8, (pargs.crop_to[1], pargs.crop_to[0], 3), # dims are backwards
+                                      shared_memory=True)
+    # downscaled rgb copies for the model, made once in the camera process
+    shared_data_object.add_frame_pyramid('frame_pyramid', ctypes.c_uint8, (pargs.crop_to[1], pargs.crop_to[0], 3),
+                                         scales=(1 / pargs.cf,),
+                                         shared_memory=True)
     shared_data_object.add_array('bbox_coords', ctypes.c_int64, (pargs.faces, 4))
     shared_data_object.add_array('error', ctypes.c_double, 2)
     shared_data_object.add_array('observed_names', ctypes.c_uint8, pargs.faces)
@@ -80,6 +87,8 @@ def main():
     # join processes
     for process in processes:
         process.join()
+    # release shared memory segments
+    shared_data_object.close()
     # exit on break key
     sys.exit()
 
@@ -52,11 +52,16 @@ def target(shared_data_object, args):
     ACTIVE_TARGET = False
     reset_counter = 0
     reset_complete = True
+    last_update = 0
+    # sleep until the model finds someone
     while True:
         if shared_data_object.n_observed_faces.value > 0:
             break
+        last_update = shared_data_object.model_update.wait(last_update, timeout=1)
 
     while True:
+        # block until there's a new model update, but no longer than one servo update
+        last_update = shared_data_object.model_update.wait(last_update, timeout=1 / MAX_SERVO_UPDATES_PER_SECOND)
 
         if shared_data_object.n_boxes_active.value == 0 and SERVO_TRACKING is True:
             if reset_complete is False :
@@ -2,8 +2,13 @@
 Containers for cv2.Capture:
 
 """
+import os
 import time
-from threading import Thread
+import queue
+import signal
+import multiprocessing
+from collections import deque
+from threading import Thread, Condition
 import platform
 from typing import Union, Optional
 
@@ -12,7 +17,399 @@ import numpy as np
 
 import otis.helpers.timers as timers
 import otis.overlay.textwriters as writers
-from otis.helpers import misc
+from otis.helpers import misc, multitools
+
+# stages of the camera loop timed by CameraPlayer.stage_timer
+CAMERA_STAGES = ('capture', 'wait', 'read', 'draw', 'sleep', 'show', 'frame')
+
+
+class CaptureStage:
+
+    def __init__(self, crop_points=None, flip=True, color_code=None):
+        """
+        crops, flips and color converts a raw camera frame into a preallocated buffer. everything is done with cv2
+        dst= arguments, so after the first call no new frames are allocated and the only full frame passes are the ones
+        cv2 has to make.
+        Args:
+            crop_points: tuple, optional
+                (x0, x1, y0, y1) of the crop. if None, the frame isn't cropped
+            flip: bool, default = True
+                flip horizontally
+            color_code: int, optional
+                cv2 color conversion code i.e. cv2.COLOR_BGR2RGB. if None, the color isn't converted
+
+        Usage:
+            rgb_stage = CaptureStage(crop_points, flip=True, color_code=cv2.COLOR_BGR2RGB)
+            rgb_frame = rgb_stage(raw_frame)
+        """
+        self.crop_points = crop_points
+        self.flip = flip
+        self.color_code = color_code
+        self.frame = None  # the output buffer
+        self._scratch = None
+
+    def __call__(self, frame, out=None):
+        """
+        Args:
+            frame: np.ndarray
+                raw frame from the camera
+            out: np.ndarray, optional
+                buffer to write to. if None, uses self.frame
+        Returns:
+            out
+        """
+        if self.crop_points is not None:
+            x0, x1, y0, y1 = self.crop_points
+            frame = frame[y0:y1, x0:x1]
+
+        if out is None:
+            out = self.frame
+
+        if self.color_code is None:
+            if self.flip is True:
+                out = cv2.flip(frame, 1, dst=out)
+            elif out is None:
+                out = frame.copy()
+            else:
+                np.copyto(out, frame)
+
+        elif self.flip is False:
+            out = cv2.cvtColor(frame, self.color_code, dst=out)
+
+        elif out is not None and out.shape == frame.shape:
+            # same number of channels, so the conversion can run in place on the flipped frame
+            cv2.flip(frame, 1, dst=out)
+            cv2.cvtColor(out, self.color_code, dst=out)
+
+        else:
+            self._scratch = cv2.flip(frame, 1, dst=self._scratch)
+            out = cv2.cvtColor(self._scratch, self.color_code, dst=out)
+
+        self.frame = out
+        return out
+
+
+class ThreadedVideoWriter:
+
+    def __init__(self,
+                 record_to,
+                 fourcc,
+                 fps,
+                 record_dim,
+                 queue_size=8,
+                 policy='block',
+                 ):
+        """
+        drop in replacement for cv2.VideoWriter that resizes and encodes frames on its own Thread so that recording
+        doesn't cost the display loop its frame rate. frames are copied into a fixed pool of buffers and handed to the
+        Thread through a bounded queue.
+
+        Args:
+            record_to: str
+                file name to record to
+            fourcc: int
+                i.e. cv2.VideoWriter_fourcc(*'mp4v')
+            fps: float
+            record_dim: tuple
+                (w, h) of the recording. frames of a different size are resized on the recording Thread
+            queue_size: int, default = 8
+                number of frames that can be waiting to be encoded
+            policy: str, default = 'block'
+                what to do when the queue is full. 'block' waits for the recorder to catch up, like cv2.VideoWriter.
+                'drop' skips the frame and counts it in self.dropped
+        """
+        assert policy in ('drop', 'block')
+        self.record_to = record_to
+        self.record_dim = tuple(int(d) for d in record_dim)
+        self.policy = policy
+        self.queue_size = queue_size
+        self.writer = cv2.VideoWriter(record_to, fourcc, fps, self.record_dim)
+
+        self.written = 0
+        self.dropped = 0
+        self._free = queue.Queue()  # empty buffers
+        self._pending = queue.Queue()  # buffers waiting to be encoded
+        self._n_buffers = 0
+        self._resized = None
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def isOpened(self):
+        return self.writer.isOpened()
+
+    def _get_buffer(self, frame):
+        try:
+            buffer = self._free.get_nowait()
+        except queue.Empty:
+            if self._n_buffers < self.queue_size:
+                self._n_buffers += 1
+                return np.empty_like(frame)
+            if self.policy == 'drop':
+                return None
+            buffer = self._free.get()
+
+        if buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+            buffer = np.empty_like(frame)
+        return buffer
+
+    def write(self, frame):
+        """
+        copies frame and queues it to be resized and encoded. returns False if the frame was dropped
+        """
+        buffer = self._get_buffer(frame)
+        if buffer is None:
+            self.dropped += 1
+            return False
+
+        np.copyto(buffer, frame)
+        self._pending.put(buffer)
+        return True
+
+    def _run(self):
+        while True:
+            buffer = self._pending.get()
+            if buffer is None:
+                return
+
+            if buffer.shape[1::-1] != self.record_dim:
+                self._resized = cv2.resize(buffer, self.record_dim, dst=self._resized)
+                self.writer.write(self._resized)
+            else:
+                self.writer.write(buffer)
+
+            self.written += 1
+            self._free.put(buffer)
+
+    def release(self):
+        """
+        finishes encoding the queued frames and releases the cv2.VideoWriter
+        """
+        if self._thread.is_alive():
+            self._pending.put(None)
+            self._thread.join()
+        self.writer.release()
+
+
+def _encoder_process_target(frames, tasks, free_slots, written, fourcc, fps, record_dim):
+    """
+    target of each ProcessVideoWriter encoder process. encodes frames from the shared memory slots it's sent into
+    whichever segment file it was last told to open, and hands each slot back on free_slots once it's done with it
+    """
+    # the render process decides when recording is over
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    writer = None
+    resized = None
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        kind, value = task
+        if kind == 'open':
+            if writer is not None:
+                writer.release()
+            writer = cv2.VideoWriter(value, fourcc, fps, record_dim)
+
+        elif kind == 'frame':
+            frame = frames.array[value]
+            if frame.shape[1::-1] != record_dim:
+                resized = cv2.resize(frame, record_dim, dst=resized)
+                writer.write(resized)
+            else:
+                writer.write(frame)
+            free_slots.put(value)
+            with written.get_lock():
+                written.value += 1
+
+        elif kind == 'close' and writer is not None:
+            writer.release()
+            writer = None
+
+    if writer is not None:
+        writer.release()
+    frames.close()
+
+
+class ProcessVideoWriter:
+
+    def __init__(self,
+                 record_to,
+                 fourcc,
+                 fps,
+                 record_dim,
+                 n_processes=2,
+                 segment_seconds=None,
+                 segment_frames=None,
+                 queue_size=16,
+                 policy='drop',
+                 ):
+        """
+        drop in replacement for cv2.VideoWriter for long recordings. frames are copied into a pool of shared memory
+        slots and encoded by separate processes, and the recording is split into segments of at most segment_seconds
+        or segment_frames. segments are handed out to the encoder processes in turn, so with n_processes > 1 the
+        encoding of consecutive segments runs in parallel. the start time and first frame of each segment are written
+        to an index file next to the segments.
+
+        record_to='otis.mp4' records to otis_0000.mp4, otis_0001.mp4, ... with the index in otis_index.csv
+
+        Args:
+            record_to: str
+                base file name of the segments
+            fourcc: int
+                i.e. cv2.VideoWriter_fourcc(*'mp4v')
+            fps: float
+            record_dim: tuple
+                (w, h) of the recording. frames of a different size are resized by the encoder process
+            n_processes: int, default = 2
+                number of encoder processes
+            segment_seconds: float, optional
+                start a new segment after this many seconds
+            segment_frames: int, optional
+                start a new segment after this many frames. bounds the size of each segment
+            queue_size: int, default = 16
+                number of shared memory slots, i.e. frames that can be waiting to be encoded
+            policy: str, default = 'drop'
+                what to do when every slot is in use. 'drop' skips the frame and counts it in self.dropped, 'block'
+                waits for an encoder to free a slot
+        """
+        assert policy in ('drop', 'block')
+        assert n_processes >= 1
+        self.record_to = record_to
+        self.fourcc = fourcc
+        self.fps = fps
+        self.record_dim = tuple(int(d) for d in record_dim)
+        self.n_processes = n_processes
+        self.segment_seconds = segment_seconds
+        self.segment_frames = segment_frames
+        self.queue_size = queue_size
+        self.policy = policy
+
+        self._base, self._ext = os.path.splitext(record_to)
+        self.index_to = f'{self._base}_index.csv'
+        self.segments = []  # (file name, start time, first frame)
+        self.dropped = 0
+        self.frame_count = 0
+
+        self._written = multiprocessing.Value('q', 0)
+        self._frames = None  # shared memory slots are made on the first write so they match the frame size
+        self._free_slots = deque()  # slots this process can write to
+        self._returned_slots = None  # slots the encoders are done with, on their way back to _free_slots
+        self._tasks = []
+        self._processes = []
+        self._segment_start = None
+        self._segment_frame_count = 0
+        self._encoder = 0
+        self._index_file = None
+
+    @property
+    def written(self):
+        return self._written.value
+
+    def _start(self, frame):
+        self._frames = multitools.SharedMemoryArray(np.ctypeslib.as_ctypes_type(frame.dtype),
+                                                    (self.queue_size, *frame.shape))
+        # every slot starts out free here. they only go through a Queue on the way back from the encoders, so the
+        # first frames don't find it empty while its feeder thread is still catching up
+        self._free_slots = deque(range(self.queue_size))
+        self._returned_slots = multiprocessing.Queue()
+
+        for _ in range(self.n_processes):
+            tasks = multiprocessing.Queue()
+            process = multiprocessing.Process(target=_encoder_process_target,
+                                              args=(self._frames, tasks, self._returned_slots, self._written,
+                                                    self.fourcc, self.fps, self.record_dim),
+                                              daemon=True
+                                              )
+            process.start()
+            self._tasks.append(tasks)
+            self._processes.append(process)
+
+        self._index_file = open(self.index_to, 'w')
+        self._index_file.write('segment,file,start_time,start_frame\n')
+
+    def _new_segment(self, now):
+        if len(self.segments) > 0:
+            self._tasks[self._encoder].put(('close', None))
+            self._encoder = (self._encoder + 1) % self.n_processes
+
+        segment = len(self.segments)
+        file_name = f'{self._base}_{segment:04d}{self._ext}'
+        self._tasks[self._encoder].put(('open', file_name))
+        self.segments.append((file_name, now, self.frame_count))
+        self._index_file.write(f'{segment},{file_name},{now:.3f},{self.frame_count}\n')
+        self._index_file.flush()
+        self._segment_start = now
+        self._segment_frame_count = 0
+
+    def _segment_is_full(self, now):
+        if self.segment_seconds is not None and now - self._segment_start >= self.segment_seconds:
+            return True
+        if self.segment_frames is not None and self._segment_frame_count >= self.segment_frames:
+            return True
+        return False
+
+    def _next_free_slot(self):
+        """
+        Returns:
+            a free slot, or None if there isn't one and the policy is 'drop'
+        """
+        if len(self._free_slots) == 0:
+            try:
+                while True:
+                    self._free_slots.append(self._returned_slots.get_nowait())
+            except queue.Empty:
+                pass
+
+        if len(self._free_slots) == 0:
+            if self.policy == 'drop':
+                return None
+            self._free_slots.append(self._returned_slots.get())
+
+        return self._free_slots.popleft()
+
+    def write(self, frame):
+        """
+        copies frame into a shared memory slot and sends it to the encoder of the current segment. returns False if
+        the frame was dropped
+        """
+        if self._frames is None:
+            self._start(frame)
+
+        slot = self._next_free_slot()
+        if slot is None:
+            self.dropped += 1
+            return False
+
+        now = time.time()
+        if self._segment_start is None or self._segment_is_full(now):
+            self._new_segment(now)
+
+        slot_frame = self._frames.array[slot]
+        if frame.shape == slot_frame.shape:
+            np.copyto(slot_frame, frame)
+        else:
+            cv2.resize(frame, slot_frame.shape[1::-1], dst=slot_frame)
+
+        self._tasks[self._encoder].put(('frame', slot))
+        self.frame_count += 1
+        self._segment_frame_count += 1
+        return True
+
+    def release(self):
+        """
+        waits for the encoders to finish the queued frames, then closes the segments and the index
+        """
+        if self._frames is None:
+            return
+
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join()
+
+        self._index_file.close()
+        self._frames.close()
+        self._frames = None
 
 
 class CameraPlayer:
@@ -25,7 +422,7 @@ class CameraPlayer:
         self.show()
         self.read()
     """
-    recorder: cv2.VideoWriter
+    recorder: Union[cv2.VideoWriter, ThreadedVideoWriter, ProcessVideoWriter]
 
     def __init__(self,
                  src=0,
@@ -38,7 +435,13 @@ class CameraPlayer:
                  record_dim=None,
                  flip = True, # flip horizontal axis
                  output_scale:float=1,
-                 record_codec = 'mp4v'
+                 record_codec = 'mp4v',
+                 threaded_recorder = True,
+                 record_queue_size = 8,
+                 record_policy = 'block',
+                 record_processes = 0,
+                 record_segment_seconds = None,
+                 record_segment_frames = None,
                  ):
         """
         Convenience object based on around cv2.CaptureVideo
@@ -68,6 +471,21 @@ class CameraPlayer:
             output_scale: float
                 increase the size of self.show()
             record_codec: str, default = 'MP4V'
+            threaded_recorder: bool, default = True
+                resize and encode recorded frames on a ThreadedVideoWriter instead of in show()
+            record_queue_size: int, default = 8
+                frames that can wait to be encoded by the threaded recorder
+            record_policy: str, default = 'block'
+                what to do when the threaded recorder falls behind. 'block' waits for it, so every frame shown is
+                recorded. 'drop' keeps show() from stalling but skips frames. they're counted in self.recorder.dropped
+                and the total is printed by stop()
+            record_processes: int, default = 0
+                if > 0, record with a ProcessVideoWriter that encodes in this many separate processes. use it for
+                long recordings
+            record_segment_seconds: float, optional
+                with record_processes > 0, split the recording into segments of this many seconds
+            record_segment_frames: int, optional
+                with record_processes > 0, split the recording into segments of at most this many frames
 
         """
         # get dimensions
@@ -114,6 +532,10 @@ class CameraPlayer:
             self.f_center = np.array((dx1//2, dy1//2), dtype=int)
             self.cropped=True
 
+        # crop and flip in one pass. consumers can add their own stages with add_capture_stage
+        self.capture_stage = CaptureStage(self._crop_points if self.cropped is True else None, flip=flip)
+        self.capture_stages = {}
+
         # incase we need a blank frame instead of a camera feed
         self.blank_frame = np.zeros((self.f_dim[1], self.f_dim[0], 3), dtype="uint8")
         # frame stuff
@@ -124,7 +546,6 @@ class CameraPlayer:
         self.stopped = False
         self._max_fps = max_fps
         self.capture.set(cv2.CAP_PROP_FPS, max_fps)
-        self.flip = flip
         self.output_scale = output_scale
         # set up smart sleeper to ensure constant show_fps
         if self.max_fps is not None:
@@ -133,12 +554,24 @@ class CameraPlayer:
             self.fps_sleeper = timers.SmartSleeper(0.)
         # monitoring
 
-        self.latency = 0.001
+        self.latency = 0.001  # milliseconds spent getting the last frame from the camera
         self.limit_fps = True
+        # per stage timing of the camera loop: capture, wait (threaded only), read, draw (between read and show),
+        # sleep (fps_sleeper), show (resize + record + imshow) and frame (show to show)
+        self.stage_timer = timers.StageTimer(stages=CAMERA_STAGES)
+        self._read_done = None
+        self._last_show = None
+        self.timing_writer = None
         self.exit_warning = writers.TextWriter((10, 40), color='u')
         self.exit_warning.text = 'to exit hit ctrl-c_spirals or q'
         # recording stuff
         self.recorder = None
+        self.threaded_recorder = threaded_recorder
+        self.record_queue_size = record_queue_size
+        self.record_policy = record_policy
+        self.record_processes = record_processes
+        self.record_segment_seconds = record_segment_seconds
+        self.record_segment_frames = record_segment_frames
         self._record = False
         self.record_to = record_to
         self.record_dim = self.f_dim if record_dim is None else record_dim
@@ -152,6 +585,14 @@ class CameraPlayer:
     def frame(self, new_frame):
         self._frame = new_frame
 
+    @property
+    def flip(self):
+        return self.capture_stage.flip
+
+    @flip.setter
+    def flip(self, new_flip):
+        self.capture_stage.flip = new_flip
+
     @property
     def max_fps(self):
         return self._max_fps
@@ -170,7 +611,26 @@ class CameraPlayer:
         assert isinstance(new, bool)
         if new is True:
             self._record = new
-            if self.recorder is None: ## TODO: check video recording outside of linux
+            if self.recorder is None and self.record_processes > 0:
+                self.recorder = ProcessVideoWriter(self.record_to,
+                                                   cv2.VideoWriter_fourcc(*self.record_codec),
+                                                   self.max_fps,
+                                                   self.record_dim,
+                                                   n_processes=self.record_processes,
+                                                   segment_seconds=self.record_segment_seconds,
+                                                   segment_frames=self.record_segment_frames,
+                                                   queue_size=2 * self.record_queue_size,
+                                                   policy=self.record_policy
+                                                   )
+            elif self.recorder is None and self.threaded_recorder is True:
+                self.recorder = ThreadedVideoWriter(self.record_to,
+                                                    cv2.VideoWriter_fourcc(*self.record_codec),
+                                                    self.max_fps,
+                                                    self.record_dim,
+                                                    queue_size=self.record_queue_size,
+                                                    policy=self.record_policy
+                                                    )
+            elif self.recorder is None: ## TODO: check video recording outside of linux
                 self.recorder = cv2.VideoWriter(self.record_to,
                                                cv2.VideoWriter_fourcc(*self.record_codec),
                                                self.max_fps,
@@ -186,22 +646,50 @@ class CameraPlayer:
         reads new frame from buffer
         :return:
             grabbed (bool), frame (np.ndarray)
+            frame is None if nothing was grabbed, like cv2. self.frame keeps the last good frame
         """
-        tick = time.time()
-        self.grabbed, self.frame = self.capture.read()
-
-        if self.cropped is True:
-            x0, x1, y0, y1 = self._crop_points
-            self._frame = self.frame[y0:y1, x0:x1]
+        tick = time.perf_counter()
+        self.grabbed, raw_frame = self.capture.read()
+        captured = time.perf_counter()
 
-        if self.flip is True:
-            self._frame[:, :, :] = self._frame[:, ::-1, :]
+        if self.grabbed is True:
+            self._frame = self.capture_stage(raw_frame, out=self._cached_frame)
+            self._run_capture_stages(raw_frame)
 
-        self.latency = int(1000*(time.time()-tick))
+        self._read_done = time.perf_counter()
+        self.stage_timer.add('capture', captured - tick)
+        self.stage_timer.add('read', self._read_done - captured)
+        self.latency = int(1000*(self._read_done-tick))
 
+        if self.grabbed is False:
+            return False, None
         return self.grabbed, self.frame
 
-    def show(self, frame=None, show_fps=False, exit_warning=False, record=None):
+    def add_capture_stage(self, name, color_code=None, flip=None):
+        """
+        adds a CaptureStage that is run on every new frame read from the camera, so that a consumer that needs the
+        frame in a different color space gets it in the same pass as the crop and flip. the output is available
+        after each read() as camera.capture_stages[name].frame
+        Args:
+            name: str
+            color_code: int, optional
+                cv2 color conversion code i.e. cv2.COLOR_BGR2RGB
+            flip: bool, optional
+                defaults to self.flip
+        Returns:
+            the new CaptureStage
+        """
+        crop_points = self._crop_points if self.cropped is True else None
+        _flip = self.flip if flip is None else flip
+        stage = CaptureStage(crop_points, flip=_flip, color_code=color_code)
+        self.capture_stages[name] = stage
+        return stage
+
+    def _run_capture_stages(self, raw_frame):
+        for stage in self.capture_stages.values():
+            stage(raw_frame)
+
+    def show(self, frame=None, show_fps=False, exit_warning=False, record=None, show_timing=False):
         """
         Equivalent to cv2.imshow('name', frame)
         Args:
@@ -213,9 +701,16 @@ class CameraPlayer:
                 show 'hit q to exit'
             record: bool, default = None
                 overrides the self.record if not None
+            show_timing: bool, default = False
+                show the p50/p95/p99 of each stage of the camera loop on the screen
         Returns:
 
         """
+        tick = time.perf_counter()
+        # everything between the end of read() and here is the caller drawing on the frame
+        if self._read_done is not None:
+            self.stage_timer.add('draw', tick - self._read_done)
+            self._read_done = None
 
         _frame = self.frame if frame is None else frame
         _record = self.record if record is None else record
@@ -223,9 +718,17 @@ class CameraPlayer:
         # run fps_sleeper to limit show_fps
         if self.max_fps is not None:
             self.fps_sleeper()
+        slept = time.perf_counter()
+        self.stage_timer.add('sleep', slept - tick)
 
         # show show_fps on screen
 
+        # show stage timings on screen
+        if show_timing is True:
+            if self.timing_writer is None:
+                self.timing_writer = writers.StageTimerWriter(self.stage_timer, coords=(10, 80), color='g')
+            self.timing_writer.write(_frame)
+
         # show exit warning on screen
         if exit_warning is True:
             self.exit_warning.write(_frame)
@@ -236,8 +739,8 @@ class CameraPlayer:
         else:
             out_frame = _frame
 
-        # record
-        if _record is True and tuple(self.record_dim) != tuple(self.f_dim):
+        # record. the threaded and process recorders do their own resizing
+        if _record is True and isinstance(self.recorder, cv2.VideoWriter) and tuple(self.record_dim) != tuple(self.f_dim):
             self.recorder.write(cv2.resize(_frame, self.record_dim))
         elif _record is True:
             self.recorder.write(_frame)
@@ -245,6 +748,11 @@ class CameraPlayer:
         # display frame
         cv2.imshow(self.name, out_frame)
 
+        shown = time.perf_counter()
+        self.stage_timer.add('show', shown - slept)
+        if self._last_show is not None:
+            self.stage_timer.add('frame', shown - self._last_show)
+        self._last_show = shown
 
     def test(self, warn=False):
         """
@@ -271,14 +779,16 @@ class CameraPlayer:
         self.capture.release()
         cv2.destroyAllWindows()
         self.stopped = True
-        if self.record is True:
+        if self.recorder is not None:
             self.recorder.release()
             print(f'video_recorded to {self.record_to}')
+            if not isinstance(self.recorder, cv2.VideoWriter) and self.recorder.dropped > 0:
+                print(f'{self.recorder.dropped} frames were dropped by the recorder')
 
 
 class ThreadedCameraPlayer(CameraPlayer):
 
-    def __init__(self, *args, cache=True, start=True, **kwargs):
+    def __init__(self, *args, cache=True, buffered=False, start=True, **kwargs):
         """
         Convenience object based on around cv2.CaptureVideo. Same as camera.CameraPlayer, but with an extra Thread
         to read from the camera feed.
@@ -311,6 +821,11 @@ class ThreadedCameraPlayer(CameraPlayer):
             cache: bool, default = True
                 cache the frame read, from the update Thread. If it's set to False, there may be flickering of written
                 assets on the screen
+            buffered: bool, default = False
+                triple buffer the frames. the update Thread crops and flips each new frame straight into a back
+                buffer and read() just swaps it to the front, so there are no full frame copies in read(). the frame
+                returned by read() belongs to the caller until the next read(), which waits for a frame that hasn't
+                been read yet. overrides cache
             start: bool, default = True
                 start the update Thread process on instantiation. If false, the update process has to be manually
                 started: i.e.
@@ -325,13 +840,24 @@ class ThreadedCameraPlayer(CameraPlayer):
         self.cache = cache
         self._frame = None
         self._cached_frame = np.copy(self.blank_frame)
+        # the update Thread notifies read() when a new frame comes in so it doesn't have to spin
+        self._new_frame = Condition()
+        self.frame_number = 0
+        self._last_read_number = 0
+        # triple buffering: front is handed out by read(), ready is the newest complete frame, back is being written
+        self.buffered = buffered
+        self._buffers = [np.copy(self.blank_frame) for _ in range(3)] if buffered is True else None
+        self._front, self._ready, self._back = 0, 1, 2
+        self._feed_error = None
         self.started = False
         if start is True:
             self.start()
 
     @property
     def frame(self):
-        if self.cache is True:
+        if self.buffered is True:
+            return self._buffers[self._front]
+        elif self.cache is True:
             return self._cached_frame
         else:
             return self._frame
@@ -347,47 +873,96 @@ class ThreadedCameraPlayer(CameraPlayer):
             if self.stopped is True:
                 return
 
-            tick = time.time()
-            self.grabbed, self._frame = self.capture.read()
-            #self.new_frame = True
-            timer = (time.time() - tick)
-            if timer == 0:
-                timer = 1
-            self.latency = 1//timer
+            tick = time.perf_counter()
+            grabbed, frame = self.capture.read()
+            self.stage_timer.add('capture', time.perf_counter() - tick)
+            new_frame = grabbed is True and frame is not None and frame.shape != ()
+
+            if new_frame is True and self.buffered is True:
+                try:
+                    self._write_back_buffer(frame)
+                except RuntimeError as e:
+                    with self._new_frame:
+                        self._feed_error = e
+                        self._new_frame.notify_all()
+                    return
+
+            with self._new_frame:
+                self.grabbed = grabbed
+                if new_frame is True:
+                    self._frame = frame
+                    if self.buffered is True:
+                        self._ready, self._back = self._back, self._ready
+                    self.frame_number += 1
+                self._new_frame.notify_all()
+            self.latency = int(1000 * (time.perf_counter() - tick))
+
+    def _write_back_buffer(self, frame):
+        """
+        crops and flips frame into the back buffer in a single pass
+        """
+        back = self._buffers[self._back]
+        if frame[self._crop_slice()].shape != back.shape:
+            raise self._dimension_error(frame)
 
+        self.capture_stage(frame, out=back)
 
-    def read(self):
+    def _crop_slice(self):
+        if self.cropped is True:
+            x0, x1, y0, y1 = self._crop_points
+            return slice(y0, y1), slice(x0, x1)
+        return slice(None), slice(None)
+
+    def _dimension_error(self, frame):
+        frame_dim = frame.shape[:2][::-1]
+        return RuntimeError(f'Video feed {frame_dim} does not match specified dimensions {self.f_dim}. This '
+                            'usually occurs because your camera is unable to record at the speficied frame size. '
+                            'Check hardware limitations and camera setting or change camera.c_dim to a smaller size'
+                            )
+
+    def read(self, wait_for_new=False):
             """
             equivalent of cv2 VideoCapture().read()
             reads new frame from buffer
+            Args:
+                wait_for_new: bool, default = False
+                    if True, blocks until the update Thread has a frame that hasn't been read yet
             :return:
                 grabbed (bool), frame (np.ndarray)
             """
-            tick = time.time()
-            while True:
-                if self._frame is not None and self._frame.shape != ():
-                    break
-
-                if time.time()-tick > 10:
+            tick = time.perf_counter()
+            # in buffered mode the front buffer may already have been drawn on, so always wait for a new one
+            _wait_for_new = wait_for_new or self.buffered
+
+            def frame_is_ready():
+                if self._feed_error is not None:
+                    return True
+                if self.frame_number == 0:
+                    return False
+                return _wait_for_new is False or self.frame_number > self._last_read_number
+
+            with self._new_frame:
+                if self._new_frame.wait_for(frame_is_ready, timeout=10) is False:
                     raise RuntimeError('External camera unable to provide video feed')
-
-            try:
+                if self._feed_error is not None:
+                    raise self._feed_error
+                self._last_read_number = self.frame_number
+                frame = self._frame
+                if self.buffered is True:
+                    self._front, self._ready = self._ready, self._front
+
+            waited = time.perf_counter()
+            self.stage_timer.add('wait', waited - tick)
+
+            self._run_capture_stages(frame)
+            if self.buffered is False:
+                if frame[self._crop_slice()].shape != self._cached_frame.shape:
+                    raise self._dimension_error(frame)
                 self._cached_frame.flags.writeable = True
-                if self.cropped is True:
-                    x0, x1, y0, y1 = self._crop_points
-                    self._cached_frame[:,:,:] = self._frame[y0:y1, x0:x1]
-                else:
-                    self._cached_frame[:,:,:] = self._frame
-
-                if self.flip is True:
-                    self._cached_frame[:,:,:] = self._cached_frame[:,::-1, :]
-
-            except RuntimeError:
-                frame_dim = self._frame.shape[:2][::-1]
-                raise RuntimeError(f'Video feed {frame_dim} does not match specified dimensions {self.f_dim}. This '
-                                   'usually occurs because your camera is unable to record at the speficied frame size. '
-                                   'Check hardware limitations and camera setting or change camera.c_dim to a smaller size'
-                                   )
+                self.capture_stage(frame, out=self._cached_frame)
+
+            self._read_done = time.perf_counter()
+            self.stage_timer.add('read', self._read_done - waited)
 
             # if self.flip is True:
             #     self._cached_frame[:, :, :] = self._frame[:, ::-1, :]
@@ -325,6 +325,68 @@ def cv2waitkey(n=1):
 def resize(frame, scale=.5):
     return cv2.resize(frame, (0, 0), fx=scale, fy=scale)
 
+
+def divide_by_255(x, scratch=None):
+    """
+    exact round(x / 255) for uint16 arrays holding products of two uint8s, in place and integer only
+
+    Args:
+        x: np.array of uint16
+        scratch: uint16 array the same shape as x, optional
+    Returns:
+        x
+    """
+    scratch = np.empty_like(x) if scratch is None else scratch
+    x += 128
+    np.right_shift(x, 8, out=scratch)
+    x += scratch
+    x >>= 8
+    return x
+
+
+def premultiply(image, alpha):
+    """
+    image * alpha / 255 with integer math
+
+    Args:
+        image: uint8 (h, w, 3)
+        alpha: uint8 (h, w, 1)
+
+    Returns:
+        uint8 (h, w, 3)
+    """
+    product = np.multiply(image, alpha, dtype=np.uint16)
+    return divide_by_255(product).astype(np.uint8)
+
+
+def blend_premultiplied(dst, premultiplied, inverse_alpha, scratch=None):
+    """
+    dst = premultiplied + dst * (255 - alpha) / 255, written straight into dst with uint16 math and no float
+    temporaries. this is the "over" operator for premultiplied alpha
+
+    Args:
+        dst: uint8 (h, w, 3) frame portion, changed in place
+        premultiplied: uint8 (h, w, 3), see premultiply
+        inverse_alpha: uint8 (h, w, 3), 255 - alpha repeated over the channels. (h, w, 1) works too, but
+            broadcasting it is a few times slower
+        scratch: uint16 array of shape (2, >=h, >=w, 3), optional. saves allocating every call
+
+    Returns:
+        dst
+    """
+    h, w, c = dst.shape
+    if scratch is None or scratch.shape[1] < h or scratch.shape[2] < w:
+        scratch = np.empty((2, h, w, c), dtype=np.uint16)
+
+    product = scratch[0, :h, :w, :c]
+    np.multiply(dst, inverse_alpha, out=product, dtype=np.uint16)
+    divide_by_255(product, scratch[1, :h, :w, :c])
+    # can't go over 255: round(s * a / 255) + round(d * (255 - a) / 255) <= a + 255 - a
+    product += premultiplied
+    np.copyto(dst, product, casting='unsafe')
+    return dst
+
+
 if __name__ == '__main__':
     import os
     from queue import Queue
@@ -359,7 +421,3 @@ if __name__ == '__main__':
 
     python_file_list = [os.path.abspath(file) for file in python_file_list]
     print(python_file_list)
-
-
-
-
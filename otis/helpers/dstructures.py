@@ -1,3 +1,7 @@
+import threading
+from collections import OrderedDict
+
+
 class BoundIterator:
     """
     iter type object with
@@ -49,3 +53,85 @@ class CounterDict(dict):
         return super().__getitem__(key)
 
 
+class LRUCache:
+
+    def __init__(self, max_size=256):
+        """
+        thread safe least recently used cache that counts its hits and misses. the process wide caches (masks, text
+        tiles, text metrics and text layouts) are all built on it and just add how their keys and values are made
+
+        Args:
+            max_size: int
+                most entries to keep before dropping the least recently used one
+
+        Usage: cache = LRUCache(64)
+               value = cache.lookup(key, lambda: make_value(key))
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def lookup(self, key, make):
+        """
+        the value stored under key. on a miss make() builds it, outside the lock so a slow build doesn't hold up
+        other threads. if two threads miss on the same key at once they both build it but share whichever got
+        stored first
+
+        Args:
+            key: hashable
+            make: function with no arguments that returns the value
+
+        Returns:
+            the value
+        """
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+
+        value = make()
+
+        with self._lock:
+            value = self._cache.setdefault(key, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return value
+
+    def values(self):
+        """
+        Returns:
+            list of the cached values, least recently used first
+        """
+        with self._lock:
+            return list(self._cache.values())
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict with hits, misses, hit_rate and size
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_rate': 0 if total == 0 else self.hits / total,
+                    'size': len(self._cache),
+                    }
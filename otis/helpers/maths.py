@@ -105,3 +105,81 @@ def remove_overlap_w_no_mass(no_mass, has_mass, buffer=0):
         x2[1] += da
 
 
+
+
+def circle_time_of_impact(d_center, d_velocity, radius_sum, dt):
+    """
+    earliest time in [0, dt] when two circles moving in straight lines first touch
+
+    Args:
+        d_center: center_1 - center_0
+        d_velocity: velocity_1 - velocity_0
+        radius_sum: r0 + r1 (plus any buffer)
+        dt: length of the time step
+
+    Returns:
+        float or None if they don't touch during the step. 0 if they already overlap
+    """
+    a = d_velocity[0] ** 2 + d_velocity[1] ** 2
+    b = 2 * (d_center[0] * d_velocity[0] + d_center[1] * d_velocity[1])
+    c = d_center[0] ** 2 + d_center[1] ** 2 - radius_sum ** 2
+
+    if c <= 0:
+        return 0.
+    # moving apart or not moving relative to each other
+    if b >= 0 or a == 0:
+        return None
+
+    discriminant = b ** 2 - 4 * a * c
+    if discriminant < 0:
+        return None
+
+    t = (-b - np.sqrt(discriminant)) / (2 * a)
+    return t if t <= dt else None
+
+
+def independent_batches(i, j):
+    """
+    splits the pairs (i[k], j[k]) into batches where no index shows up twice, keeping earlier pairs in earlier
+    batches. working through the batches one after another gives the same result as going through the pairs one at
+    a time, but each batch can be done in one go with fancy indexing
+
+    Args:
+        i, j: np.arrays of indices with i[k] != j[k]
+
+    Returns:
+        list of np.arrays of positions into i and j
+    """
+    batches = []
+    remaining = np.arange(len(i))
+    while len(remaining) > 0:
+        # a pair goes in this batch if it's the first remaining pair for both of its indices. the first pair always
+        # makes it, so every batch takes at least one
+        ends = np.column_stack((i[remaining], j[remaining])).ravel()
+        first = np.zeros(len(ends), dtype=bool)
+        first[np.unique(ends, return_index=True)[1]] = True
+        free = first[0::2] & first[1::2]
+        batches.append(remaining[free])
+        remaining = remaining[~free]
+
+    return batches
+
+
+def border_time_of_impact(position, velocity, low, high):
+    """
+    time until a point moving along one axis reaches low or high. np.inf if it never will
+
+    Args:
+        position: float
+        velocity: float, units per second
+        low, high: the borders
+
+    Returns:
+        float
+    """
+    if velocity > 0:
+        return max((high - position) / velocity, 0.)
+    elif velocity < 0:
+        return max((low - position) / velocity, 0.)
+    else:
+        return np.inf
@@ -1,9 +1,12 @@
 """
 tools for using the multiprocessing python package
 """
+import os
 import sys
 import multiprocessing
+from multiprocessing import shared_memory
 
+import cv2
 import numpy as np
 import ctypes
 
@@ -51,13 +54,32 @@ class SharedDataObject:
         and
         some_parameter = shared_data.value_name.value
         """
-        pass
+        self._shared_memory_segments = {}
 
-    def add_array(self, array_name, c_type, dim):
+    def add_array(self, array_name, c_type, dim, shared_memory=False, segment_name=None):
+        """
+        adds a shared np.ndarray called array_name
+        Args:
+            array_name: str
+            c_type: ctype or str
+            dim: int or tuple
+            shared_memory: bool, default = False
+                if True, the array is backed by a named multiprocessing.shared_memory segment instead of a
+                multiprocessing.Array. a read-only, zero-copy view can then be had in any process from
+                shared_data.view(array_name)
+            segment_name: str, optional
+                name of the shared memory segment. if None, a unique name is generated
+        """
         if c_type in self._ctype_hash.keys():
             c_type = self._ctype_hash[c_type]
 
-        l = np.product(dim)
+        if shared_memory is True:
+            segment = SharedMemoryArray(c_type, dim, name=segment_name)
+            self._shared_memory_segments[array_name] = segment
+            setattr(self, array_name, segment.array)
+            return
+
+        l = np.prod(dim)
 
         np_dtype = np.dtype(c_type).name
         new_array = multiprocessing.Array(c_type, int(l)).get_obj()
@@ -70,6 +92,504 @@ class SharedDataObject:
 
         setattr(self, value_name, new_value)
 
+    def add_sequence_event(self, event_name):
+        """
+        adds a SharedSequenceEvent. use it to let other processes block until something new happens instead of
+        polling a shared value in a while loop
+
+        shared_data.add_sequence_event('model_update')
+        # in the model process
+        shared_data.model_update.publish()
+        # in the servo process
+        last_update = shared_data.model_update.wait(last_update, timeout=.1)
+        """
+        setattr(self, event_name, SharedSequenceEvent())
+
+    def add_frame_ring(self, ring_name, c_type, dim, n_slots=3, shared_memory=False, segment_name=None):
+        """
+        adds a SharedFrameRing of n_slots frames of shape dim. use this instead of add_array for frames that are
+        written by one process (i.e. the camera) and read by others (i.e. the models)
+
+        shared_data.add_frame_ring('frame', ctypes.c_uint8, (h, w, 3))
+        # in the camera process
+        shared_data.frame.write(frame)
+        # in the model process
+        frame_number, frame_copy = shared_data.frame.read(out=frame_copy)
+
+        if shared_memory is True, the frames live in a named multiprocessing.shared_memory segment.
+        """
+        if c_type in self._ctype_hash.keys():
+            c_type = self._ctype_hash[c_type]
+
+        new_ring = SharedFrameRing(c_type, dim, n_slots=n_slots, shared_memory=shared_memory, segment_name=segment_name)
+        setattr(self, ring_name, new_ring)
+
+    def add_frame_pyramid(self, pyramid_name, c_type, dim, scales=(.5,), rgb=True, n_slots=3, shared_memory=False):
+        """
+        adds a SharedFramePyramid of downscaled (and by default RGB converted) copies of frames of shape dim. the
+        camera process writes it once per frame and each model process views the level it needs
+
+        shared_data.add_frame_pyramid('frame_pyramid', ctypes.c_uint8, (h, w, 3), scales=(1, 1/2))
+        # in the camera process
+        shared_data.frame_pyramid.write(frame)
+        # in the model process
+        frame_number, small_rgb_frame = shared_data.frame_pyramid.view(1/2)
+        """
+        if c_type in self._ctype_hash.keys():
+            c_type = self._ctype_hash[c_type]
+
+        new_pyramid = SharedFramePyramid(c_type, dim,
+                                         scales=scales,
+                                         rgb=rgb,
+                                         n_slots=n_slots,
+                                         shared_memory=shared_memory
+                                         )
+        setattr(self, pyramid_name, new_pyramid)
+
+    def view(self, array_name):
+        """
+        returns a read-only view of a shared array without copying it. it can be handed straight to cv2 functions
+        that take a src i.e. cv2.resize(shared_data.view('frame'), ...)
+        """
+        if array_name in self._shared_memory_segments:
+            return self._shared_memory_segments[array_name].view()
+
+        out = getattr(self, array_name).view()
+        out.flags.writeable = False
+        return out
+
+    def close(self):
+        """
+        closes and unlinks any shared memory segments created by this SharedDataObject. only needs to be called once
+        from the parent process after all the child processes have been joined.
+
+        the shared memory arrays are deleted from the object first, so using one afterwards raises an AttributeError
+        instead of touching memory that's been unmapped. views you've kept hold of yourself aren't safe after this
+        """
+        for value in self.__dict__.values():
+            if isinstance(value, (SharedFrameRing, SharedFramePyramid)):
+                value.close()
+        for array_name, segment in self._shared_memory_segments.items():
+            self.__dict__.pop(array_name, None)
+            segment.close()
+        self._shared_memory_segments = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # shared memory arrays are re-attached by name in the child process
+        for array_name in self._shared_memory_segments:
+            del state[array_name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for array_name, segment in self._shared_memory_segments.items():
+            setattr(self, array_name, segment.array)
+
+
+class SharedSequenceEvent:
+
+    def __init__(self):
+        """
+        a shared counter paired with a multiprocessing.Condition. the publisher bumps the counter and wakes everyone
+        waiting on it. waiters block until the counter moves past the last value they saw, so nothing spins a core
+        while there's nothing new to do.
+        """
+        self._count = multiprocessing.RawValue(ctypes.c_int64, 0)
+        self._condition = multiprocessing.Condition()
+
+    @property
+    def count(self):
+        return self._count.value
+
+    def publish(self, count=None):
+        """
+        sets the counter to count (or adds 1 to it if count is None) and wakes all waiting processes. note that
+        multiprocessing.Condition.notify_all doesn't return until every sleeper has actually woken up, so with a few
+        readers asleep each publish can hold up the caller (ie the camera loop) for about a millisecond at the
+        tail, more when the readers are short on cpu
+        Returns:
+            the new count
+        """
+        with self._condition:
+            self._count.value = self._count.value + 1 if count is None else count
+            self._condition.notify_all()
+            return self._count.value
+
+    def wait(self, last_count=0, timeout=None):
+        """
+        blocks until the counter is greater than last_count or timeout seconds have passed
+        Args:
+            last_count: int
+                the last count the caller has dealt with
+            timeout: float, optional
+                seconds to wait. None waits forever
+        Returns:
+            the current count. it is <= last_count if the wait timed out
+        """
+        if self._count.value > last_count:
+            return self._count.value
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._count.value > last_count, timeout)
+            return self._count.value
+
+
+class SharedMemoryArray:
+
+    def __init__(self, c_type, dim, name=None):
+        """
+        a np.ndarray backed by a named multiprocessing.shared_memory segment. the segment is created by the process
+        that instantiates the SharedMemoryArray. when it is passed to another process it is re-attached by name
+        instead of being copied.
+
+        Args:
+            c_type: ctype
+            dim: int or tuple
+            name: str, optional
+                name of the segment. if None, a unique name is generated
+        """
+        self.dtype = np.dtype(c_type)
+        self.dim = tuple(int(d) for d in np.atleast_1d(dim))
+        n_bytes = max(int(np.prod(self.dim)) * self.dtype.itemsize, 1)
+        self._segment = shared_memory.SharedMemory(name=name, create=True, size=n_bytes)
+        self.name = self._segment.name
+        self._owner_pid = os.getpid()  # forked children inherit the object but don't own the segment
+        self._make_array()
+
+    def _make_array(self):
+        self.array = np.ndarray(self.dim, dtype=self.dtype, buffer=self._segment.buf)
+        self._read_only = self.array.view()
+        self._read_only.flags.writeable = False
+
+    def __getstate__(self):
+        return {'dtype': self.dtype, 'dim': self.dim, 'name': self.name}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._segment = shared_memory.SharedMemory(name=self.name)
+        self._owner_pid = None
+        self._make_array()
+
+    def view(self):
+        """
+        read-only view of the shared array. no copy is made
+        """
+        return self._read_only
+
+    def close(self):
+        """
+        closes the segment in this process, the process that created it also unlinks it
+        """
+        if self._segment is None:
+            return
+        del self.array, self._read_only
+        self._segment.close()
+        if self._owner_pid == os.getpid():
+            self._segment.unlink()
+        self._segment = None
+
+
+class SharedFrameRing:
+
+    def __init__(self, c_type, dim, n_slots=3, shared_memory=False, segment_name=None):
+        """
+        single writer / multiple reader ring of shared frames. each slot has its own sequence counter that is odd
+        while the writer is copying into it and even (2 * frame_number) once the frame is complete, so a reader can
+        always tell whether the frame it copied was torn and try again with the newest one. copying frames in and out
+        takes no locks, so the writer never waits for a reader to finish with a frame and a slow model can't hold up
+        the display loop. the only lock is the one in new_frame: every write() / end_write() takes it to wake any
+        readers blocked in wait(), and waits there until they're awake (see SharedSequenceEvent.publish).
+
+        Args:
+            c_type: ctype
+                i.e. ctypes.c_uint8
+            dim: tuple
+                shape of a single frame i.e. (h, w, 3)
+            n_slots: int, default = 3
+                number of frames in the ring. needs to be at least 2. more slots give slow readers more time
+                before the slot they are reading from is reused
+            shared_memory: bool, default = False
+                keep the frames in a named multiprocessing.shared_memory segment
+            segment_name: str, optional
+                name of the shared_memory segment. if None, a unique name is generated
+        """
+        assert n_slots >= 2
+        self.c_type = c_type
+        self.dim = tuple(int(d) for d in np.atleast_1d(dim))
+        self.n_slots = n_slots
+        self._frame_size = int(np.prod(self.dim))
+        # raw (lock free) shared buffers
+        if shared_memory is True:
+            self._frame_buffer = SharedMemoryArray(c_type, (n_slots, *self.dim), name=segment_name)
+        else:
+            self._frame_buffer = multiprocessing.RawArray(c_type, self._frame_size * n_slots)
+        self._raw_sequences = multiprocessing.RawArray(ctypes.c_uint64, n_slots)
+        self._raw_state = multiprocessing.RawArray(ctypes.c_int64, 2)  # latest slot, latest frame number
+        self._raw_state[0] = -1
+        self._writing = None
+        self.new_frame = SharedSequenceEvent()
+        self._make_views()
+
+    def _make_views(self):
+        np_dtype = np.dtype(self.c_type).name
+        if isinstance(self._frame_buffer, SharedMemoryArray):
+            self.frames = self._frame_buffer.array
+        else:
+            self.frames = np.frombuffer(self._frame_buffer, dtype=np_dtype).reshape((self.n_slots, *self.dim))
+        self._read_only_frames = self.frames.view()
+        self._read_only_frames.flags.writeable = False
+        self.sequences = np.frombuffer(self._raw_sequences, dtype=np.uint64)
+        self._state = np.frombuffer(self._raw_state, dtype=np.int64)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the numpy views are rebuilt from the shared buffers in the child process
+        for key in ('frames', '_read_only_frames', 'sequences', '_state'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._make_views()
+
+    @property
+    def shape(self):
+        return self.dim
+
+    @property
+    def latest_slot(self):
+        return int(self._state[0])
+
+    @property
+    def frame_number(self):
+        """
+        number of complete frames written to the ring. 0 means nothing has been written yet
+        """
+        return int(self._state[1])
+
+    def write(self, frame):
+        """
+        copies frame into the next slot of the ring. only one process should write to the ring
+        Args:
+            frame: np.ndarray of shape self.dim
+        Returns:
+            frame_number of the new frame
+        """
+        frame_number, slot_frame = self.begin_write()
+        slot_frame[...] = frame
+        self.end_write()
+        return frame_number
+
+    def begin_write(self):
+        """
+        marks the next slot as being written and returns it so it can be used as a cv2 dst without an extra copy.
+        must be followed by end_write()
+
+        frame_number, slot_frame = ring.begin_write()
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=slot_frame)
+        ring.end_write()
+
+        Returns:
+            frame_number, slot_frame
+        """
+        slot = (int(self._state[0]) + 1) % self.n_slots
+        frame_number = int(self._state[1]) + 1
+        self.sequences[slot] = 2 * frame_number - 1  # odd -> writing
+        self._writing = slot, frame_number
+        return frame_number, self.frames[slot]
+
+    def end_write(self):
+        """
+        publishes the slot returned by begin_write() and wakes any readers blocked in wait()
+        """
+        slot, frame_number = self._writing
+        self.sequences[slot] = 2 * frame_number  # even -> complete
+        self._state[1] = frame_number
+        self._state[0] = slot
+        self.new_frame.publish(frame_number)
+
+    def read(self, out=None, max_tries=10):
+        """
+        copies the latest complete frame into out. never blocks the writer.
+        Args:
+            out: np.ndarray of shape self.dim, optional
+                if None, a new array is returned as out
+            max_tries: int
+                number of attempts to get an untorn frame before giving up
+        Returns:
+            frame_number, out
+            frame_number is 0 and out is unchanged if no frame has been written or every attempt was torn
+        """
+        if out is None:
+            out = np.zeros(self.dim, dtype=self.frames.dtype)
+
+        for _ in range(max_tries):
+            slot = int(self._state[0])
+            if slot < 0:
+                return 0, out
+            seq_0 = int(self.sequences[slot])
+            if seq_0 % 2 == 1:
+                continue
+            out[...] = self.frames[slot]
+            if int(self.sequences[slot]) == seq_0:
+                return seq_0 // 2, out
+
+        return 0, out
+
+    def view(self):
+        """
+        zero-copy version of read. returns a read-only view of the latest complete frame. the view stays valid until
+        the writer comes back around to its slot, so check it with is_valid(frame_number) once you're done with it.
+
+        frame_number, frame = shared_data.frame.view()
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+        if shared_data.frame.is_valid(frame_number) is False:
+            continue  # the frame was overwritten while we used it
+
+        Returns:
+            frame_number, frame
+            frame_number is 0 and frame is None if no frame is available
+        """
+        slot = int(self._state[0])
+        if slot < 0:
+            return 0, None
+
+        seq_0 = int(self.sequences[slot])
+        if seq_0 % 2 == 1:
+            return 0, None
+
+        return seq_0 // 2, self._read_only_frames[slot]
+
+    def wait(self, frame_number=0, timeout=None):
+        """
+        blocks until a frame newer than frame_number has been written
+        Args:
+            frame_number: int
+                the last frame the caller has dealt with
+            timeout: float, optional
+        Returns:
+            the latest frame_number. it is <= frame_number if the wait timed out
+        """
+        return self.new_frame.wait(frame_number, timeout=timeout)
+
+    def is_valid(self, frame_number):
+        """
+        True if the frame returned by view() for frame_number hasn't been touched by the writer since
+        """
+        if frame_number < 1:
+            return False
+        slot = (frame_number - 1) % self.n_slots
+        return int(self.sequences[slot]) == 2 * frame_number
+
+    def close(self):
+        if isinstance(self._frame_buffer, SharedMemoryArray):
+            # reading the ring after this raises an AttributeError instead of touching unmapped memory
+            self.__dict__.pop('frames', None)
+            self.__dict__.pop('_read_only_frames', None)
+            self._frame_buffer.close()
+
+
+class SharedFramePyramid:
+
+    def __init__(self, c_type, dim, scales=(.5,), rgb=True, n_slots=3, shared_memory=False):
+        """
+        a SharedFrameRing per level of pre-downscaled copies of a frame. the writer (i.e. the camera process) does the
+        resize and color conversion once per frame so that models sharing the feed don't each do it themselves.
+        every level of a frame is published with the same frame_number.
+
+        Args:
+            c_type: ctype
+            dim: tuple
+                shape of the full size frame i.e. (h, w, 3)
+            scales: tuple of floats, default = (.5,)
+                scale of each level relative to the full size frame. 1 is allowed and gives a color converted copy
+            rgb: bool, default = True
+                convert levels from BGR to RGB
+            n_slots: int, default = 3
+                slots in the ring of each level
+            shared_memory: bool, default = False
+                keep the frames in named multiprocessing.shared_memory segments
+        """
+        self.dim = tuple(int(d) for d in np.atleast_1d(dim))
+        self.scales = tuple(sorted(scales, reverse=True))
+        self.rgb = rgb
+        self.levels = []
+        for scale in self.scales:
+            assert 0 < scale <= 1
+            level_dim = (max(int(round(self.dim[0] * scale)), 1), max(int(round(self.dim[1] * scale)), 1), *self.dim[2:])
+            self.levels.append(SharedFrameRing(c_type, level_dim, n_slots=n_slots, shared_memory=shared_memory))
+        # the writer's BGR scratch buffers, one per level, so that each level is resized from the one above it
+        self._scratch = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_scratch'] = None
+        return state
+
+    def level(self, scale):
+        """
+        returns the SharedFrameRing with the closest scale
+        """
+        i = int(np.argmin([abs(s - scale) for s in self.scales]))
+        return self.levels[i]
+
+    def write(self, frame):
+        """
+        downscales and converts frame into every level of the pyramid
+        Args:
+            frame: np.ndarray of shape self.dim (BGR)
+        Returns:
+            frame_number
+        """
+        if self._scratch is None:
+            self._scratch = [np.zeros(ring.dim, dtype=ring.frames.dtype) for ring in self.levels]
+
+        source = frame
+        frame_number = 0
+        for ring, scratch in zip(self.levels, self._scratch):
+            if scratch.shape != source.shape:
+                cv2.resize(source, scratch.shape[1::-1], dst=scratch, interpolation=cv2.INTER_AREA)
+                source = scratch
+
+            frame_number, slot_frame = ring.begin_write()
+            if self.rgb is True:
+                cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=slot_frame)
+            else:
+                slot_frame[...] = source
+            ring.end_write()
+
+        return frame_number
+
+    def view(self, scale):
+        """
+        zero-copy, read-only view of the latest frame in the level closest to scale. see SharedFrameRing.view
+        Returns:
+            frame_number, frame
+        """
+        return self.level(scale).view()
+
+    def read(self, scale, out=None):
+        """
+        copy of the latest frame in the level closest to scale. see SharedFrameRing.read
+        Returns:
+            frame_number, out
+        """
+        return self.level(scale).read(out=out)
+
+    def is_valid(self, scale, frame_number):
+        return self.level(scale).is_valid(frame_number)
+
+    def wait(self, frame_number=0, timeout=None):
+        """
+        blocks until every level of a frame newer than frame_number has been written. see SharedFrameRing.wait
+        """
+        return self.levels[-1].wait(frame_number, timeout=timeout)
+
+    def close(self):
+        for ring in self.levels:
+            ring.close()
+
 
 class LibraryImportProcess(multiprocessing.Process):
 
@@ -80,5 +600,3 @@ class LibraryImportProcess(multiprocessing.Process):
         ### add imports here
         if self._target:
             self._target(*self._args, **self._kwargs)
-
-
@@ -314,6 +314,200 @@ class Cursor(Blinker):
         else:
             return self.char_0
 
+class TimingHistogram:
+
+    def __init__(self, size=300):
+        """
+        fixed-size ring of the last size timings (in seconds) with percentile accessors. adding a timing doesn't
+        allocate, so it's cheap enough to use in the frame loop.
+        Args:
+            size: int, default = 300
+                number of timings kept. at 30 fps, 300 is the last 10 seconds
+        """
+        self.size = size
+        self._times = np.zeros(size, dtype=float)
+        self._i = 0
+        self.n = 0
+
+    def add(self, seconds):
+        self._times[self._i] = seconds
+        self._i = (self._i + 1) % self.size
+        self.n = min(self.n + 1, self.size)
+
+    @property
+    def times(self):
+        return self._times[:self.n]
+
+    @property
+    def last(self):
+        if self.n == 0:
+            return 0.
+        return self._times[self._i - 1]
+
+    @property
+    def mean(self):
+        if self.n == 0:
+            return 0.
+        return float(np.mean(self.times))
+
+    def percentile(self, q):
+        """
+        q-th percentile (0-100) of the timings in seconds
+        """
+        if self.n == 0:
+            return 0.
+        return float(np.percentile(self.times, q))
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p95(self):
+        return self.percentile(95)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+    def reset(self):
+        self._i = 0
+        self.n = 0
+
+
+class StageTimer(Timer):
+
+    def __init__(self, stages=(), size=300):
+        """
+        keeps a TimingHistogram for each named stage of a loop. it works like a lap timer, calling it with a stage name
+        records the time since the last call (or start) to that stage.
+
+        Args:
+            stages: tuple of str
+                stage names to set up in advance. new names are added as they're used
+            size: int, default = 300
+                size of each TimingHistogram
+
+        Usage: stage_timer = StageTimer()
+               while True:
+                    stage_timer.start()
+                    ....
+                    stage_timer('capture')
+                    ....
+                    stage_timer('draw')
+
+               stage_timer['draw'].p95 <----- 95th percentile of draw time in seconds
+        """
+        self.size = size
+        self.histograms = {stage: TimingHistogram(size) for stage in stages}
+        self._tick = None
+
+    def __getitem__(self, stage):
+        if stage not in self.histograms:
+            self.histograms[stage] = TimingHistogram(self.size)
+        return self.histograms[stage]
+
+    @property
+    def stages(self):
+        return list(self.histograms.keys())
+
+    def start(self):
+        self._tick = time.perf_counter()
+        return self
+
+    def add(self, stage, seconds):
+        self[stage].add(seconds)
+
+    def __call__(self, stage):
+        """
+        records the time since the last call to stage and returns it
+        """
+        tock = time.perf_counter()
+        if self._tick is None:
+            self._tick = tock
+            return 0.
+
+        elapsed = tock - self._tick
+        self._tick = tock
+        self[stage].add(elapsed)
+        return elapsed
+
+    def summary(self, ms=True):
+        """
+        Returns:
+            dict of stage: (p50, p95, p99) in milliseconds if ms is True else in seconds
+        """
+        m = 1000 if ms is True else 1
+        return {stage: (h.p50 * m, h.p95 * m, h.p99 * m) for stage, h in self.histograms.items()}
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self._tick = None
+
+
+class FixedStepClock(Timer):
+
+    def __init__(self, step=1 / 60, max_steps=5):
+        """
+        fixed timestep clock for simulations. real time piles up in an accumulator and calling the clock
+        returns how many whole steps of size step are due, so physics always runs at the same dt no matter
+        how fast or jittery the render loop is. whatever is left over is available as alpha for interpolating
+        draw positions between the last two steps.
+
+        Args:
+            step: float
+                size of a step in seconds
+            max_steps: int
+                most steps returned for one call. if a frame takes forever the extra time is dropped instead of
+                trying to catch up (and making the next frame even slower)
+
+        Usage: clock = FixedStepClock(1/60)
+               while True:
+                    for _ in range(clock()):
+                        ... physics with dt = clock.step
+                    ... draw at previous + clock.alpha * (current - previous)
+        """
+        self.step = step
+        self.max_steps = max_steps
+        self.accumulator = 0.
+        self._tick = None
+
+    @property
+    def ups(self):
+        return 1 / self.step
+
+    @property
+    def alpha(self):
+        """
+        fraction of a step left in the accumulator, between 0 and 1
+        """
+        return self.accumulator / self.step
+
+    def __call__(self):
+        tock = time.perf_counter()
+        # the first call just starts the clock and runs a single step so there's something to draw
+        if self._tick is None:
+            self._tick = tock
+            return 1
+
+        self.accumulator += tock - self._tick
+        self._tick = tock
+
+        n_steps = int(self.accumulator // self.step)
+        if n_steps > self.max_steps:
+            n_steps = self.max_steps
+            self.accumulator = 0.
+        else:
+            self.accumulator -= n_steps * self.step
+
+        return n_steps
+
+    def reset(self):
+        self.accumulator = 0.
+        self._tick = None
+
+
 class TimedCycle(Timer):
 
     def __init__(self,
@@ -1,3 +1,4 @@
 from otis.overlay.assetholders.movers import *
 from otis.overlay.assetholders.groups import *
-from otis.overlay.assetholders.bounders import *
\ No newline at end of file
+from otis.overlay.assetholders.bounders import *
+from otis.overlay.assetholders.pools import *
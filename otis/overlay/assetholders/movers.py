@@ -29,7 +29,9 @@ class AssetMover:
                  gravity=0,
                  dampen=0.,
                  copy_asset=True,
-                 show_hitbox = False
+                 show_hitbox = False,
+                 fixed_step=None,
+                 continuous=False,
                  ):
         """
         moves the assets
@@ -49,6 +51,12 @@ class AssetMover:
             dampen: (float) proportion of velocity change that transfers during a collision
             copy_asset=True,
             show_hitbox = False
+            fixed_step: (float) seconds per physics step. if set, ups is pinned to 1 / fixed_step and
+                update_velocity runs every time it's called instead of waiting on the update_limiter. meant to be
+                driven by a timers.FixedStepClock (see step())
+            continuous: (bool) if True, move() finds the exact time the mover hits a border during the step and
+                bounces it there instead of checking the proposed position ahead of time and clamping afterwards,
+                so fast movers can't skip past the border
         """
 
         self._coords = np.zeros(4)
@@ -61,13 +69,7 @@ class AssetMover:
         self.asset.center = (0, 0)
         self.asset.ref = self._coords[:2]
 
-        if velocity_format == 'mag_radians':
-            mag, theta = velocity
-            tan = np.tan(theta)
-            x = np.sqrt(mag ** 2 / (1 + tan ** 2))
-            self._coords[2:] = x, x * tan
-        else:
-            self._coords[2:] = velocity
+        self.set_velocity(velocity, velocity_format)
 
         self.movers.append(self)
         AssetMover._n_movers += 1
@@ -94,9 +96,17 @@ class AssetMover:
             self.y_range += (height//2, -height//2)
             self.x_range += (width//2, -width//2)
 
+        self.fixed_step = fixed_step
+        self.continuous = continuous
+        if fixed_step is not None:
+            ups = 1 / fixed_step
         self.ups = ups
         self._ups = ups
         self.update_limiter = timers.CallFrequencyLimiter(1 / ups)
+        self.previous_center = self._coords[:2].copy()
+        # set by swept collisions: where the bounce at the time of impact puts the mover, relative to just moving
+        # it at its new velocity for the whole step. move() adds it on
+        self.toi_offset = np.zeros(2)
         self.real_time_elapsed = timers.TimeSinceLast()
         self.real_time_elapsed()
         self.is_finished = False
@@ -116,6 +126,64 @@ class AssetMover:
 
 
 
+    def set_velocity(self, velocity, velocity_format='mag_radians'):
+        """
+        Args:
+            velocity: (magnitude, radians) or (x, y)
+            velocity_format: either 'mag_radians' or 'xy'
+        """
+        if velocity_format == 'mag_radians':
+            mag, theta = velocity
+            tan = np.tan(theta)
+            x = np.sqrt(mag ** 2 / (1 + tan ** 2))
+            self._coords[2:] = x, x * tan
+        else:
+            self._coords[2:] = velocity
+
+    def reset(self, center=None, velocity=None, velocity_format='mag_radians'):
+        """
+        brings a finished mover back to life so it can be reused instead of building a new one (see MoverPool).
+        keeps the asset, ranges, mass, etc.
+
+        Args:
+            center: new center, keeps the old one if None
+            velocity: new velocity, keeps the old one if None
+            velocity_format: either 'mag_radians' or 'xy'
+
+        Returns:
+            self
+        """
+        # let go of any manager's array, the next manager will bind it again
+        self._coords = self._coords.copy()
+        self.asset.ref = self._coords[:2]
+
+        if center is not None:
+            self._coords[:2] = center
+        if velocity is not None:
+            self.set_velocity(velocity, velocity_format)
+
+        self.previous_center[:] = self._coords[:2]
+        self.toi_offset[:] = 0
+        self.is_finished = False
+        self._x_border_collision = False
+        self._y_border_collision = False
+        self.has_moved = False
+        self.real_time_elapsed = timers.TimeSinceLast()
+        self.real_time_elapsed()
+        return self
+
+    def bind(self, coords):
+        """
+        points the mover (and its asset) at a new (x, y, vx, vy) buffer, ie a row in an ArrayAssetManager.
+        the current values get copied over
+
+        Args:
+            coords: np.array view of length 4
+        """
+        coords[:] = self._coords
+        self._coords = coords
+        self.asset.ref = self._coords[:2]
+
     @property
     def coords(self):
         return self._coords
@@ -162,19 +230,53 @@ class AssetMover:
 
     def update_velocity(self):
         # don't update if it's not time
-        if self.update_limiter() is False or self.is_finished is True:
+        if self.is_finished is True:
+            return
+        if self.fixed_step is None and self.update_limiter() is False:
             return
 
         self.velocity[1] -= self.gravity
-        self._check_for_border_collisions()
-        self._update_velocity_from_b_collisions()
+        # continuous movers handle the borders in move()
+        if self.continuous is False:
+            self._check_for_border_collisions()
+            self._update_velocity_from_b_collisions()
 
     def move(self):
-        self.coords[0] += self.velocity[0] / self.ups
-        self.coords[1] += self.velocity[1] / self.ups
+        self._coords[:2] += self.toi_offset
+        self.toi_offset[:] = 0
+        if self.continuous is True:
+            self._swept_move()
+        else:
+            self.coords[0] += self.velocity[0] / self.ups
+            self.coords[1] += self.velocity[1] / self.ups
         self._check_for_boundary_snags()
 
-    def write(self, frame, safe_delete=False, **kwargs):
+    def _swept_move(self):
+        # the borders are axis aligned, so each axis can be swept on its own
+        dt = 1 / self.ups
+        for axis, (low, high) in enumerate((self.x_range, self.y_range)):
+            v = self.velocity[axis]
+            t = maths.border_time_of_impact(self._coords[axis], v, low, high)
+
+            if t >= dt:
+                self._coords[axis] += v * dt
+
+            elif self.border_collisions is False:
+                self._coords[axis] += v * dt
+                self.is_finished = True
+
+            else:
+                # move to the border, bounce, and spend the rest of the step going the other way
+                self.velocity[axis] = -v * self.dampening
+                self._coords[axis] += v * t + self.velocity[axis] * (dt - t)
+
+    def interpolated_center(self, alpha):
+        """
+        position between the last two physics steps. alpha = 0 is the previous step, 1 is the current one
+        """
+        return self.previous_center + alpha * (self._coords[:2] - self.previous_center)
+
+    def write(self, frame, safe_delete=False, alpha=None, center=None, **kwargs):
         """
 
         Args:
@@ -185,6 +287,10 @@ class AssetMover:
                         self.asset.write(frame, **kwargs)
                     except:
                         self.is_finished = True
+            alpha: float, optional
+                draw at interpolated_center(alpha) instead of the current center. used with fixed_step
+            center: np.array, optional
+                draw here instead of the current center
 
         Returns:
             N/A
@@ -192,7 +298,15 @@ class AssetMover:
         if self.is_finished is True:
             return
 
-        self.ups = 1. / self.real_time_elapsed()
+        if self.fixed_step is None:
+            self.ups = 1. / self.real_time_elapsed()
+
+        if center is None and alpha is not None:
+            center = self.interpolated_center(alpha)
+        if center is not None:
+            self.asset.ref = center
+        draw_center = self.asset.ref
+
         if safe_delete is True:
             try:
                 self.asset.write(frame, **kwargs)
@@ -201,9 +315,19 @@ class AssetMover:
         else:
             self.asset.write(frame, **kwargs)
             if self.show_hitbox is True:
-                self.outline.coords[:2] = self.coords[:2]
+                self.outline.coords[:2] = draw_center
                 self.outline.write(frame)
 
+        self.asset.ref = self._coords[:2]
+
+    def step(self):
+        """
+        one fixed size physics step. saves the old center for interpolated_center
+        """
+        self.previous_center[:] = self._coords[:2]
+        self.update_velocity()
+        self.move()
+
     def update_move_write(self, frame):
         self.update_velocity()
         self.move()
@@ -263,7 +387,11 @@ class CollidingAssetManager:
                  border_collision=True,
                  max_movers=None,
                  buffer=0,
-                 move_before_delete=100,
+                 broad_phase=True,
+                 cell_size=128,
+                 fixed_step=None,
+                 max_substeps=5,
+                 continuous=False,
                  ):
 
         """
@@ -277,20 +405,42 @@ class CollidingAssetManager:
             max_movers: int
                 how many mover assets max
             buffer: tbd
+            broad_phase: bool, default=True
+                only check pairs of movers that share a SpatialHash cell instead of every pair
+            cell_size: int
+                SpatialHash cell size in pixels. about the diameter of a typical mover works well
+            fixed_step: float, optional
+                seconds per physics step. if set, step() runs the physics on a timers.FixedStepClock and write()
+                draws the movers interpolated between steps, so the physics doesn't depend on the frame rate
+            max_substeps: int
+                most physics steps run per frame when using fixed_step
+            continuous: bool, default=False
+                use swept (time of impact) tests for circle to circle and border collisions so fast movers
+                can't pass through each other or the border between steps. see AssetMover
         """
 
         self.collisions = collisions
         self.border_collision = border_collision
         self.movers = deque([], max_movers)
         self.dim = dim
-        self.detector = CollisionDetector(buffer=buffer, move_before_delete=move_before_delete)
+        self.detector = CollisionDetector(buffer=buffer)
         self.max_movers = max_movers
+        self.broad_phase = broad_phase
+        self.continuous = continuous
+        self.spatial_hash = SpatialHash(cell_size=cell_size, buffer=buffer, swept=continuous)
+        self.clock = None if fixed_step is None else timers.FixedStepClock(fixed_step, max_substeps)
+        self.pool = None
 
     @property
     def n(self):
         return len(self.movers)
 
     def append(self, new):
+        # the deque drops the oldest mover when it's full, so give that one back to the pool first
+        if self.pool is not None and self.max_movers is not None and self.n >= self.max_movers:
+            oldest = self.movers.popleft()
+            oldest.is_finished = True
+            self.pool.release(oldest)
         self.movers.append(new)
 
     def reset_movers(self):
@@ -305,27 +455,60 @@ class CollidingAssetManager:
         for mover in self.movers:
             if mover.is_finished is False:
                 living_movers.append(mover)
+            elif self.pool is not None:
+                self.pool.release(mover)
             else:
                 del mover
 
         self.movers = deque(living_movers, self.max_movers)
 
     def update_velocities(self):
-        if self.collisions is True and self.n >= 2:
+        if self.collisions is True and self.n >= 2 and self.broad_phase is True:
+            self.spatial_hash.update(self.movers)
+            contacts = [(m0, m1) for m0, m1 in self.spatial_hash.pairs() if self._collide(m0, m1) is True]
+            self.detector.resolve_overlaps(contacts)
 
+        elif self.collisions is True and self.n >= 2:
+            contacts = []
             for i in range(self.n-1):
                 m0 = self.movers[i]
                 for j in range(i+1, self.n):
                     m1 = self.movers[j]
-                    self.detector.collide(m0, m1)
+                    if self._collide(m0, m1) is True:
+                        contacts.append((m0, m1))
+            self.detector.resolve_overlaps(contacts)
 
         for mover in self.movers:
+            if self.continuous is True:
+                mover.continuous = True
             mover.update_velocity()
 
-    def write(self, frame):
+    def _collide(self, m0, m1):
+        if self.continuous is True:
+            return self.detector.collide(m0, m1, dt=1 / m0.ups)
+        return self.detector.collide(m0, m1)
 
+    def write(self, frame, **kwargs):
+        alpha = None if self.clock is None else self.clock.alpha
         for mover in self.movers:
-            mover.write(frame)
+            mover.write(frame, alpha=alpha, **kwargs)
+
+    def composite(self, frame, compositor, image=None):
+        """
+        draws all the (ImageAsset) movers through a compositor.SpriteCompositor in one batch instead of one
+        write per mover
+
+        Args:
+            frame: cv2 frame
+            compositor: compositor.SpriteCompositor
+            image: image to stamp on every mover instead of their own
+        """
+        alpha = None if self.clock is None else self.clock.alpha
+        for mover in self.movers:
+            if mover.is_finished is False:
+                center = mover.center if alpha is None else mover.interpolated_center(alpha)
+                compositor.add_asset(mover.asset, image=image, center=center)
+        compositor.write(frame)
 
     def move(self):
         """
@@ -338,28 +521,569 @@ class CollidingAssetManager:
             if mover.is_finished is False:
                 mover.move()
                 live_movers.append(mover)
+            elif self.pool is not None:
+                self.pool.release(mover)
             else:
                 del mover
         self.movers = live_movers
 
+    def step(self, obstacles=(), buffer=None):
+        """
+        runs however many fixed size physics steps are due on self.clock (or a single one without fixed_step)
+
+        Args:
+            obstacles: list of assets the movers bounce off of that aren't movers, ie face bounding boxes
+            buffer: buffer for the obstacle collisions
+
+        Returns:
+            int, number of steps run
+        """
+        n_steps = 1 if self.clock is None else self.clock()
+        for _ in range(n_steps):
+            for mover in self.movers:
+                if self.clock is not None:
+                    mover.fixed_step = self.clock.step
+                    mover.ups = self.clock.ups
+                mover.previous_center[:] = mover.center
+
+            self.update_velocities()
+            for obstacle in obstacles:
+                for mover in self.movers:
+                    self.detector.collide(obstacle, mover, buffer=buffer)
+            self.move()
+
+        return n_steps
+
     def loop(self, frame):
-        self.update_velocities()
-        self.move()
+        if self.clock is not None:
+            self.step()
+        else:
+            self.update_velocities()
+            self.move()
         self.write(frame)
 
+
+class ArrayAssetManager:
+
+    def __init__(self,
+                 dim=(1920, 1080),
+                 collisions=False,
+                 border_collision=True,
+                 max_movers=None,
+                 buffer=0,
+                 ups=60,
+                 capacity=64,
+                 fixed_step=None,
+                 max_substeps=5,
+                 continuous=False,
+                 ):
+        """
+        drop in replacement for CollidingAssetManager that keeps the positions, velocities, radii and masses of
+        every mover in contiguous numpy arrays. gravity, border checks, circle to circle collisions and
+        integration happen as batched vector operations instead of per mover / per pair python calls.
+        the AssetMovers become thin views into self.coords, so mover.center, mover.velocity, etc still work.
+
+        Args:
+            dim: frame dimensions
+            collisions: bool, default = False
+                do assets collide
+            border_collision: bool, default=True
+                not used, each mover keeps its own border_collision setting
+            max_movers: int
+                how many mover assets max. the oldest mover gets dropped when a new one pushes past it
+            buffer: int
+                extra distance between circles before they count as colliding
+            ups: updates per second. the same as AssetMover.ups
+            capacity: int
+                starting size of the arrays. they double whenever they fill up
+            fixed_step: float, optional
+                seconds per physics step. overrides ups. see CollidingAssetManager
+            max_substeps: int
+                most physics steps run per frame when using fixed_step
+            continuous: bool, default=False
+                swept (time of impact) circle to circle and border collisions. see CollidingAssetManager
+        """
+        self.collisions = collisions
+        self.border_collision = border_collision
+        self.dim = dim
+        self.buffer = buffer
+        self.max_movers = max_movers
+        self.detector = CollisionDetector(buffer=buffer)
+        self.clock = None if fixed_step is None else timers.FixedStepClock(fixed_step, max_substeps)
+        self.ups = ups if self.clock is None else self.clock.ups
+        self.update_limiter = timers.CallFrequencyLimiter(1 / self.ups)
+        self.continuous = continuous
+        self.pool = None
+
+        self._movers = []
+        self._capacity = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old_n = self.n
+        old = getattr(self, 'coords', None)
+
+        coords = np.zeros((capacity, 4), dtype=float)
+        previous_centers = np.zeros((capacity, 2), dtype=float)
+        radii = np.zeros(capacity, dtype=float)
+        inverse_masses = np.zeros(capacity, dtype=float)
+        x_ranges = np.zeros((capacity, 2), dtype=float)
+        y_ranges = np.zeros((capacity, 2), dtype=float)
+        gravity = np.zeros(capacity, dtype=float)
+        dampening = np.zeros(capacity, dtype=float)
+        bounces = np.zeros(capacity, dtype=bool)
+        is_circle = np.zeros(capacity, dtype=bool)
+
+        if old is not None:
+            coords[:old_n] = self.coords[:old_n]
+            previous_centers[:old_n] = self.previous_centers[:old_n]
+            radii[:old_n] = self.radii[:old_n]
+            inverse_masses[:old_n] = self.inverse_masses[:old_n]
+            x_ranges[:old_n] = self.x_ranges[:old_n]
+            y_ranges[:old_n] = self.y_ranges[:old_n]
+            gravity[:old_n] = self.gravity[:old_n]
+            dampening[:old_n] = self.dampening[:old_n]
+            bounces[:old_n] = self.bounces[:old_n]
+            is_circle[:old_n] = self.is_circle[:old_n]
+
+        self.coords = coords
+        self.previous_centers = previous_centers
+        self.radii = radii
+        self.inverse_masses = inverse_masses
+        self.x_ranges = x_ranges
+        self.y_ranges = y_ranges
+        self.gravity = gravity
+        self.dampening = dampening
+        self.bounces = bounces
+        self.is_circle = is_circle
+        self._capacity = capacity
+
+        # the old rows are gone, so point every mover at its new one
+        for i, mover in enumerate(self._movers):
+            mover._coords = self.coords[i]
+            mover.asset.ref = mover._coords[:2]
+
+    @property
+    def n(self):
+        return len(self._movers)
+
+    @property
+    def movers(self):
+        return self._movers
+
+    @property
+    def centers(self):
+        return self.coords[:self.n, :2]
+
+    @property
+    def velocities(self):
+        return self.coords[:self.n, 2:]
+
+    def kinetic_energy(self):
+        """
+        total 1/2 m v^2 of the movers that can move. collisions between circles are elastic, so with no gravity and
+        no border dampening this should stay put from step to step
+
+        Returns:
+            float
+        """
+        n = self.n
+        movable = self.inverse_masses[:n] > 0
+        speeds_2 = np.einsum('ij,ij->i', self.coords[:n, 2:], self.coords[:n, 2:])
+        return 0.5 * float(np.sum(speeds_2[movable] / self.inverse_masses[:n][movable]))
+
+    def append(self, new):
+        if self.max_movers is not None and self.n >= self.max_movers:
+            self._movers[0].is_finished = True
+            self.remove_finished()
+
+        if self.n == self._capacity:
+            self._allocate(2 * self._capacity)
+
+        i = self.n
+        new.bind(self.coords[i])
+        self.previous_centers[i] = new.center
+        if self.clock is not None:
+            new.fixed_step = self.clock.step
+            new.ups = self.clock.ups
+        self.radii[i] = new.radius if new.hitbox_type == 'circle' else 0
+        self.inverse_masses[i] = 0 if new.mass is None else 1 / new.mass
+        self.x_ranges[i] = new.x_range
+        self.y_ranges[i] = new.y_range
+        self.gravity[i] = new.gravity
+        self.dampening[i] = new.dampening
+        self.bounces[i] = new.border_collisions
+        self.is_circle[i] = new.hitbox_type == 'circle'
+        self._movers.append(new)
+
+    def add_movers(self, new_movers):
+        for mover in new_movers:
+            self.append(mover)
+
+    def reset_movers(self):
+        for mover in self._movers:
+            mover._coords = mover._coords.copy()
+            mover.asset.ref = mover._coords[:2]
+        self._movers = []
+
+    def remove_finished(self):
+        n = self.n
+        alive = np.array([mover.is_finished is False for mover in self._movers], dtype=bool)
+        if alive.all():
+            return
+
+        n_alive = int(alive.sum())
+        for array in (self.coords, self.previous_centers, self.radii, self.inverse_masses, self.x_ranges, self.y_ranges,
+                      self.gravity, self.dampening, self.bounces, self.is_circle):
+            array[:n_alive] = array[:n][alive]
+
+        # finished movers keep a private copy of their last position in case anything else still holds them
+        for mover in self._movers:
+            if mover.is_finished is True:
+                mover._coords = mover._coords.copy()
+                mover.asset.ref = mover._coords[:2]
+                if self.pool is not None:
+                    self.pool.release(mover)
+
+        self._movers = [mover for mover in self._movers if mover.is_finished is False]
+        for i, mover in enumerate(self._movers):
+            mover._coords = self.coords[i]
+            mover.asset.ref = mover._coords[:2]
+
+    def update_velocities(self):
+        if self.collisions is True and self.n >= 2:
+            self._collide_circles()
+            self._collide_others()
+
+        if self.clock is not None or self.update_limiter() is True:
+            self._update_from_gravity_and_borders()
+
+    def candidate_pairs(self):
+        """
+        sweep and prune over x. sorts the circles by x and only pairs up the ones whose x distance is within
+        reach, so the exact distance check runs on O(n_points + n_pairs) pairs instead of all n_points^2
+
+        Returns:
+            i, j: np.arrays of mover indices with i < j
+        """
+        circles = np.nonzero(self.is_circle[:self.n])[0]
+        n = len(circles)
+        if n < 2:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        order = circles[np.argsort(self.coords[circles, 0], kind='stable')]
+        xs = self.coords[order, 0]
+        reach = 2 * self.radii[order].max() + self.buffer
+        if self.continuous is True:
+            # two movers can close at most twice the top speed in a step
+            speeds = np.hypot(self.coords[circles, 2], self.coords[circles, 3])
+            reach += 2 * speeds.max() / self.ups
+
+        # every circle pairs with the ones after it in the sort up to the first one out of reach
+        ends = np.searchsorted(xs, xs + reach, side='right')
+        counts = ends - np.arange(n) - 1
+        starts = np.repeat(np.arange(n), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        a = order[starts]
+        b = order[starts + 1 + offsets]
+
+        return np.minimum(a, b), np.maximum(a, b)
+
+    def _collide_circles(self):
+        i, j = self.candidate_pairs()
+        if len(i) == 0:
+            return
+
+        reach = self.radii[i] + self.radii[j] + self.buffer
+        movable = self.inverse_masses[i] + self.inverse_masses[j] > 0
+        t = self._times_of_impact(i, j, reach)
+        if self.continuous is True:
+            contact = movable & (t <= 1 / self.ups)
+        else:
+            contact = movable & (t == 0)
+
+        # earliest contacts first, so they land in the earliest batches
+        order = np.argsort(t[contact], kind='stable')
+        i, j, reach, touching = i[contact][order], j[contact][order], reach[contact][order], t[contact][order] == 0
+        if len(i) == 0:
+            return
+
+        batches = maths.independent_batches(i, j)
+        last_hit = np.zeros(self.n)
+        for _ in range(self.detector.iterations):
+            if self._bounce_circles(i, j, reach, batches, last_hit) == 0:
+                break
+
+        # pairs that only meet later in the step aren't overlapping, and their centers have been moved back along
+        # their new velocities, so only the ones touching from the start get pushed apart
+        if self.continuous is True:
+            i, j, reach = i[touching], j[touching], reach[touching]
+            batches = maths.independent_batches(i, j)
+        self._separate_circles(i, j, reach, batches)
+
+    def _times_of_impact(self, i, j, reach, start=0):
+        """
+        vectorized maths.circle_time_of_impact for the pairs i, j moving at their current velocities
+
+        Args:
+            start: float or np.array, optional
+                only look for impacts from this time into the step on
+
+        Returns:
+            np.array of times. start for pairs that are touching then, inf for pairs that never meet
+        """
+        d_velocities = self.coords[j, 2:] - self.coords[i, 2:]
+        d_centers = self.coords[j, :2] - self.coords[i, :2] + d_velocities * np.reshape(start, (-1, 1))
+        a = np.einsum('ij,ij->i', d_velocities, d_velocities)
+        b = 2 * np.einsum('ij,ij->i', d_centers, d_velocities)
+        c = np.einsum('ij,ij->i', d_centers, d_centers) - reach ** 2
+        discriminant = b ** 2 - 4 * a * c
+
+        t = np.full(len(i), np.inf)
+        t[c <= 0] = 0
+        hit = (c > 0) & (b < 0) & (a > 0) & (discriminant >= 0)
+        t[hit] = (-b[hit] - np.sqrt(discriminant[hit])) / (2 * a[hit])
+        return t + start
+
+    def _bounce_circles(self, i, j, reach, batches, last_hit):
+        """
+        one Gauss-Seidel pass of elastic impulses over the contacts, a batch at a time. every batch sees the
+        velocities the batches before it left behind, so each impulse is a proper two body bounce and the total
+        kinetic energy can't grow the way it does when all the impulses are worked out from the same velocities.
+
+        in continuous mode each pair bounces at its time of impact t with the normal it has then, and the pair's
+        centers get moved back by dv * t, so that after move() adds v' * dt they end up at x + v * t + v' * (dt - t).
+        moved back like that a center is only right from its last impact on (last_hit), so later impacts are only
+        looked for after that
+
+        Returns:
+            int, number of pairs that bounced
+        """
+        centers = self.coords[:self.n, :2]
+        velocities = self.coords[:self.n, 2:]
+        dt = 1 / self.ups
+        n_bounced = 0
+
+        for batch in batches:
+            b_i, b_j = i[batch], j[batch]
+            if self.continuous is True:
+                t = self._times_of_impact(b_i, b_j, reach[batch], np.maximum(last_hit[b_i], last_hit[b_j]))
+            else:
+                t = np.zeros(len(batch))
+            hit = t <= dt
+            t = np.where(hit, t, 0)[:, None]
+
+            d_velocities = velocities[b_i] - velocities[b_j]
+            normals = centers[b_i] - centers[b_j] + d_velocities * t
+            dist_2 = np.einsum('ij,ij->i', normals, normals)
+            closing = np.einsum('ij,ij->i', d_velocities, normals)
+            # only bounce pairs that are still moving toward each other
+            keep = hit & (closing < 0) & (dist_2 > 0)
+            if not keep.any():
+                continue
+
+            b_i, b_j, t = b_i[keep], b_j[keep], t[keep]
+            w_i = self.inverse_masses[b_i, None]
+            w_j = self.inverse_masses[b_j, None]
+            impulse = (-2 * closing[keep] / dist_2[keep])[:, None] * normals[keep] / (w_i + w_j)
+            # no mover shows up twice in a batch, so plain fancy indexing is safe
+            velocities[b_i] += impulse * w_i
+            velocities[b_j] -= impulse * w_j
+            centers[b_i] -= impulse * w_i * t
+            centers[b_j] += impulse * w_j * t
+            last_hit[b_i] = last_hit[b_j] = t[:, 0]
+            n_bounced += len(b_i)
+
+        return n_bounced
+
+    def _separate_circles(self, i, j, reach, batches):
+        # vectorized CollisionDetector.separate_circles, resolved a batch at a time like the impulses with the same
+        # bounded number of sweeps
+        centers = self.coords[:self.n, :2]
+
+        for _ in range(self.detector.iterations):
+            n_overlapping = 0
+            for batch in batches:
+                b_i, b_j = i[batch], j[batch]
+                d_centers = centers[b_j] - centers[b_i]
+                distance = np.hypot(d_centers[:, 0], d_centers[:, 1])
+                overlap = reach[batch] - distance
+                overlapping = overlap >= 0
+                if not overlapping.any():
+                    continue
+
+                b_i, b_j = b_i[overlapping], b_j[overlapping]
+                d_centers, distance = d_centers[overlapping], distance[overlapping]
+                normals = np.zeros_like(d_centers)
+                normals[:, 0] = 1
+                apart = distance > 0
+                normals[apart] = d_centers[apart] / distance[apart, None]
+
+                w_i = self.inverse_masses[b_i, None]
+                w_j = self.inverse_masses[b_j, None]
+                correction = (overlap[overlapping] + 1)[:, None] * normals / (w_i + w_j)
+                centers[b_i] -= correction * w_i
+                centers[b_j] += correction * w_j
+                n_overlapping += len(b_i)
+
+            if n_overlapping == 0:
+                break
+
+    def _collide_others(self):
+        # rectangles are rare, so they go through the regular pairwise detector
+        others = np.nonzero(~self.is_circle[:self.n])[0]
+        for a in range(len(others) - 1):
+            for b in range(a + 1, len(others)):
+                self.detector.collide(self._movers[others[a]], self._movers[others[b]])
+
+    def _update_from_gravity_and_borders(self):
+        n = self.n
+        coords = self.coords[:n]
+        coords[:, 3] -= self.gravity[:n]
+        # continuous mode handles the borders in move()
+        if self.continuous is True:
+            return
+
+        proposed = coords[:, :2] + coords[:, 2:] / self.ups
+        x_hit = (proposed[:, 0] <= self.x_ranges[:n, 0]) | (proposed[:, 0] >= self.x_ranges[:n, 1])
+        y_hit = (proposed[:, 1] <= self.y_ranges[:n, 0]) | (proposed[:, 1] >= self.y_ranges[:n, 1])
+
+        bounces = self.bounces[:n]
+        coords[:, 2] = np.where(x_hit & bounces, -self.dampening[:n] * coords[:, 2], coords[:, 2])
+        coords[:, 3] = np.where(y_hit & bounces, -self.dampening[:n] * coords[:, 3], coords[:, 3])
+
+        for k in np.nonzero((x_hit | y_hit) & ~bounces)[0]:
+            self._movers[k].is_finished = True
+
+    def move(self):
+        """
+        moves the movers and prunes the movers with mover.is_finished = True
+        Returns: N/A
+
+        """
+        self.remove_finished()
+        n = self.n
+        if n == 0:
+            return
+
+        centers = self.coords[:n, :2]
+        if self.continuous is True:
+            self._swept_move()
+        else:
+            centers += self.coords[:n, 2:] / self.ups
+
+        # make sure nothing is snagged on a boundary
+        x0, x1 = self.x_ranges[:n, 0], self.x_ranges[:n, 1]
+        y0, y1 = self.y_ranges[:n, 0], self.y_ranges[:n, 1]
+        centers[:, 0] = np.where(centers[:, 0] < x0, x0 + 1, np.where(centers[:, 0] > x1, x1 - 1, centers[:, 0]))
+        centers[:, 1] = np.where(centers[:, 1] < y0, y0 + 1, np.where(centers[:, 1] > y1, y1 - 1, centers[:, 1]))
+
+    def _swept_move(self):
+        # vectorized AssetMover._swept_move
+        n = self.n
+        dt = 1 / self.ups
+        bounces = self.bounces[:n]
+        leaving = np.zeros(n, dtype=bool)
+
+        for axis, ranges in enumerate((self.x_ranges, self.y_ranges)):
+            position = self.coords[:n, axis]
+            velocity = self.coords[:n, 2 + axis]
+            low, high = ranges[:n, 0], ranges[:n, 1]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = np.where(velocity > 0, (high - position) / velocity,
+                             np.where(velocity < 0, (low - position) / velocity, np.inf))
+            t = np.clip(t, 0, dt)
+            hit = t < dt
+            bounce = hit & bounces
+            leaving |= hit & ~bounces
+
+            new_velocity = np.where(bounce, -self.dampening[:n] * velocity, velocity)
+            position += np.where(bounce, velocity * t + new_velocity * (dt - t), velocity * dt)
+            velocity[:] = new_velocity
+
+        for k in np.nonzero(leaving)[0]:
+            self._movers[k].is_finished = True
+
+    def step(self, obstacles=(), buffer=None):
+        """
+        runs however many fixed size physics steps are due on self.clock (or a single one without fixed_step)
+
+        Args:
+            obstacles: list of assets the movers bounce off of that aren't movers, ie face bounding boxes
+            buffer: buffer for the obstacle collisions
+
+        Returns:
+            int, number of steps run
+        """
+        n_steps = 1 if self.clock is None else self.clock()
+        for _ in range(n_steps):
+            self.previous_centers[:self.n] = self.coords[:self.n, :2]
+            self.update_velocities()
+            for obstacle in obstacles:
+                for mover in self._movers:
+                    self.detector.collide(obstacle, mover, buffer=buffer)
+            self.move()
+
+        return n_steps
+
+    def write(self, frame, **kwargs):
+        if self.clock is None:
+            for mover in self._movers:
+                mover.write(frame, **kwargs)
+            return
+
+        # interpolate every mover at once, then hand each one its row to draw at
+        n = self.n
+        alpha = self.clock.alpha
+        draw_centers = self.previous_centers[:n] + alpha * (self.coords[:n, :2] - self.previous_centers[:n])
+        for mover, center in zip(self._movers, draw_centers):
+            mover.write(frame, center=center, **kwargs)
+
+    def composite(self, frame, compositor, image=None):
+        """
+        draws all the (ImageAsset) movers through a compositor.SpriteCompositor in one batch instead of one
+        write per mover
+
+        Args:
+            frame: cv2 frame
+            compositor: compositor.SpriteCompositor
+            image: image to stamp on every mover instead of their own
+        """
+        n = self.n
+        draw_centers = self.coords[:n, :2]
+        if self.clock is not None:
+            alpha = self.clock.alpha
+            draw_centers = self.previous_centers[:n] + alpha * (draw_centers - self.previous_centers[:n])
+
+        for mover, center in zip(self._movers, draw_centers):
+            compositor.add_asset(mover.asset, image=image, center=center)
+        compositor.write(frame)
+
+    def loop(self, frame):
+        if self.clock is not None:
+            self.step()
+        else:
+            self.update_velocities()
+            self.move()
+        self.write(frame)
+
+
 class CollisionDetector:
     """
-    currently only supports circles, currently not optimized for searches faster than O(n_points^2)
+    supports circle/circle and rectangle/rectangle collisions. it only handles one pair at a time, so use a
+    SpatialHash to find the pairs worth checking instead of trying all O(n_points^2) of them
     """
-    def __init__(self, buffer=1, move_before_delete=10):
+    def __init__(self, buffer=1, iterations=4):
         """
 
         Args:
             buffer: adds
-            move_before_delete:
+            iterations: int
+                max number of sweeps over all the contacts in resolve_overlaps
         """
         self.buffer = buffer
-        self.moves_before_delete = move_before_delete
+        self.iterations = iterations
 
     def check(self, asset_0, asset_1, buffer=0):
         _buffer = buffer if buffer is not None else self.buffer
@@ -380,7 +1104,7 @@ class CollisionDetector:
     def _rect_to_rect_check(self, rect0, rect1):
         pass
 
-    def collide(self, asset_0, asset_1, buffer=None):
+    def collide(self, asset_0, asset_1, buffer=None, dt=None):
         buffer = self.buffer if buffer is None else buffer
         """
         checks for collisions and change velocities based on the collisiosn
@@ -388,14 +1112,117 @@ class CollisionDetector:
         Args:
             asset_0:
             asset_1:
+            dt: float, optional
+                length of the coming step in seconds. if given, circles that aren't touching yet but will be during
+                the step bounce now (see maths.circle_time_of_impact) instead of passing through each other
 
         Returns:
+            bool, True if they collided
+        """
+        if asset_0.hitbox_type == 'circle' and asset_1.hitbox_type == 'circle' and dt is not None:
+            return self._two_circle_swept_update(asset_0, asset_1, buffer, dt)
+        elif asset_0.hitbox_type == 'circle' and asset_1.hitbox_type == 'circle':
+            return self._two_circle_velocity_update2(asset_0, asset_1, buffer)
+        elif asset_0.hitbox_type == 'rectangle' and asset_1.hitbox_type == 'rectangle':
+            return self._two_rectangle_velocity_update(asset_0, asset_1, buffer)
+        return False
 
+    def separate(self, asset_0, asset_1, buffer=None):
         """
+        pushes two overlapping assets apart without touching their velocities
+        Returns:
+            bool, True if they were overlapping
+        """
+        buffer = self.buffer if buffer is None else buffer
         if asset_0.hitbox_type == 'circle' and asset_1.hitbox_type == 'circle':
-            self._two_circle_velocity_update2(asset_0, asset_1, buffer)
+            return self.separate_circles(asset_0, asset_1, buffer)
         elif asset_0.hitbox_type == 'rectangle' and asset_1.hitbox_type == 'rectangle':
-            self._two_rectangle_velocity_update(asset_0, asset_1, buffer)
+            return self.separate_rectangles(asset_0, asset_1, buffer)
+        return False
+
+    def resolve_overlaps(self, pairs, buffer=None):
+        """
+        separating one pair can push it into a neighbor, so this sweeps over all the contacts a few times.
+        capped at self.iterations sweeps so a pile up can't blow up the frame time
+
+        Args:
+            pairs: list of (asset_0, asset_1) that were in contact this tick
+        """
+        for _ in range(self.iterations):
+            overlapping = False
+            for asset_0, asset_1 in pairs:
+                if self.separate(asset_0, asset_1, buffer) is True:
+                    overlapping = True
+
+            if overlapping is False:
+                break
+
+    @staticmethod
+    def _correction_weights(asset_0, asset_1):
+        # how much of the correction each asset takes. mass=None means it doesn't move
+        w0 = 0. if asset_0.mass is None else 1 / asset_0.mass
+        w1 = 0. if asset_1.mass is None else 1 / asset_1.mass
+        w_sum = w0 + w1
+        if w_sum == 0:
+            return None
+        return w0 / w_sum, w1 / w_sum
+
+    def separate_circles(self, circle_0, circle_1, buffer=0):
+        """
+        closed form version of maths.remove_overlap. moves the circles apart along the line connecting their
+        centers, split by mass, so they end up 1 pixel past touching
+
+        Returns:
+            bool, True if they were overlapping
+        """
+        d_center = circle_1.center - circle_0.center
+        distance = np.hypot(*d_center)
+        overlap = circle_0.radius + circle_1.radius + buffer - distance
+        if overlap < 0:
+            return False
+
+        weights = self._correction_weights(circle_0, circle_1)
+        if weights is None:
+            return True
+
+        if distance == 0:
+            normal = np.array((1., 0.))
+        else:
+            normal = d_center / distance
+        correction = (overlap + 1) * normal
+        w0, w1 = weights
+        if w0 > 0:
+            circle_0.center -= correction * w0
+        if w1 > 0:
+            circle_1.center += correction * w1
+        return True
+
+    def separate_rectangles(self, rect_0, rect_1, buffer=0):
+        """
+        moves the rectangles apart along the axis with the smallest overlap, split by mass
+
+        Returns:
+            bool, True if they were overlapping
+        """
+        d_center = rect_1.center - rect_0.center
+        x_overlap = (rect_0.width + rect_1.width) / 2 + buffer - abs(d_center[0])
+        y_overlap = (rect_0.height + rect_1.height) / 2 + buffer - abs(d_center[1])
+        if x_overlap < 0 or y_overlap < 0:
+            return False
+
+        weights = self._correction_weights(rect_0, rect_1)
+        if weights is None:
+            return True
+
+        axis = 0 if x_overlap < y_overlap else 1
+        overlap = (x_overlap, y_overlap)[axis]
+        direction = 1 if d_center[axis] >= 0 else -1
+        w0, w1 = weights
+        if w0 > 0:
+            rect_0.center[axis] -= direction * (overlap + 1) * w0
+        if w1 > 0:
+            rect_1.center[axis] += direction * (overlap + 1) * w1
+        return True
 
 
     def _two_rectangle_velocity_update(self, rect_0, rect_1, buffer):
@@ -425,128 +1252,47 @@ class CollisionDetector:
                     rect_1.velocity[1] *= -1
                 if rect_0.mass != None:
                     rect_0.velocity[1] *= -1
-            i=0
-            while True:
-                if rect_1.mass != None:
-                    rect_1.move()
-                if rect_0.mass != None:
-                    rect_0.move()
-
-                cx0, cy0, = rect_0.center
-                cx1, cy1, = rect_1.center
-
-                dx = int(abs(cx0 - cx1))
-                dy = int(abs(cy0 - cy1))
-
-                x_overlap = dx - (w0 + w1) // 2 - buffer
-                y_overlap = dy - (h0 + h1) // 2 - buffer
-
-                if x_overlap > 1 or y_overlap > 1:
-                    break
+            self.separate_rectangles(rect_0, rect_1, buffer)
+            return True
 
-                if i > self.moves_before_delete:
-                    break
-                i += 1
+        return False
 
-    def _two_circle_velocity_update(self, circle_0, circle_1, buffer):
+    def _two_circle_swept_update(self, circle_0, circle_1, buffer, dt):
+        if self._two_circle_velocity_update2(circle_0, circle_1, buffer) is True:
+            return True
 
-        v0 = circle_0.velocity
-        v1 = circle_1.velocity
-        c0 = circle_0.center
-        c1 = circle_1.center
-        m0 = circle_0.mass
-        m1 = circle_0.mass
-        r0 = circle_0.radius
-        r1 = circle_1.radius
+        t = maths.circle_time_of_impact(circle_1.center - circle_0.center,
+                                        circle_1.velocity - circle_0.velocity,
+                                        circle_0.radius + circle_1.radius + buffer,
+                                        dt
+                                        )
+        if t is None:
+            return False
 
-        d_center = c0 - c1
+        # bounce off of where they'll be when they touch
+        d_center = (circle_0.center + circle_0.velocity * t) - (circle_1.center + circle_1.velocity * t)
+        v0, v1 = circle_0.velocity.copy(), circle_1.velocity.copy()
+        self._circle_impulse(circle_0, circle_1, d_center)
+        # they only turn around at t, so after move() they should be at x + v * t + v' * (dt - t). the offset waits
+        # for move() so the centers still look untouched to the overlap checks for the rest of this step
+        circle_0.toi_offset -= (circle_0.velocity - v0) * t
+        circle_1.toi_offset -= (circle_1.velocity - v1) * t
+        return True
+
+    def _circle_impulse(self, circle_0, circle_1, d_center):
+        # elastic bounce along d_center (circle_0 - circle_1), split by mass. mass=None doesn't move
         dist_2 = np.sum(d_center ** 2)
-        distance = np.sqrt(dist_2)
-
-        # collisions hash makes it so that balls don't interact until they have fully separated
-        # need to add
-        if distance <= (r0 + r1) + buffer and circle_0.mass is None:
-            d_velocity = v0 - v1
-            dot_p1 = np.inner(-d_velocity, -d_center)
-            d_v1 = -2  * (dot_p1 / dist_2) * (-d_center)
-            circle_1.coords[2:] += d_v1
-            i = 0
-            while True:
-                circle_1.move()
-                distance = maths.linear_distance(circle_1.center, circle_0.center)
-                if distance > (r0 + r1) + buffer:
-                    break
-
-                if i>self.moves_before_delete :
-                    circle_1.is_finished=True
-                    print('deleted by bounder')
-                    break
-
-                i+=1
-
-        # todo : turn the while loops on circle collision into some kind of function to get rid of the boilerplate
-        elif distance <= (r0 + r1) + buffer and circle_1.mass is None:
-            d_velocity = v0 - v1
-            dot_p0 = np.inner(d_velocity, d_center)
-            d_v0 = -2 * (dot_p0 / dist_2) * d_center
-            circle_0.coords[2:] += d_v0
-            # remove_overlap_w_no_mass(circle_1, circle_0)
-            i=0
-            while True:
-                circle_0.move()
-                distance = maths.linear_distance(circle_1.center, circle_0.center)
-
-                if distance > (r0 + r1) + buffer:
-                    break
-
-                if i > self.moves_before_delete:
-                    circle_0.is_finished = True
-                    print('deleted by bounder')
-                    break
-
-                i += 1
-
-        elif distance <= (r0 + r1) + buffer: #and circle_0.collision_hash[circle_1.id] is False:
-
-            d_velocity = v0 - v1
-            dot_p0 = np.inner(d_velocity, d_center)
-            dot_p1 = np.inner(-d_velocity, -d_center)
-
-            d_v0 = -2 * m1 / (m0 + m1) * (dot_p0 / dist_2) * d_center
-            d_v1 = -2 * m0 / (m0 + m1) * (dot_p1 / dist_2) * (-d_center)
-
-            circle_0.coords[2:] += d_v0
-            circle_1.coords[2:] += d_v1
+        closing = np.dot(circle_0.velocity - circle_1.velocity, d_center)
+        weights = self._correction_weights(circle_0, circle_1)
+        if dist_2 == 0 or closing >= 0 or weights is None:
+            return
 
-            i=0
-            while True:
-                circle_0.move()
-                circle_1.move()
-                distance = maths.linear_distance(circle_1.center, circle_0.center)
-
-                if distance > (r0 + r1) + buffer:
-                    break
-
-                if i > self.moves_before_delete:
-                    print('deleted by collision')
-                    circle_1.is_finished = True
-                    circle_0.is_finished = True
-                    break
-
-                i += 1
-        ###############################################################
-        # NOT CURRENTLY USING COLLISION_HASH. MAY COME BACK TO IT
-        ###############################################################
-            # circle_0.collision_hash[circle_1.id] = True
-            # circle_1.collision_hash[circle_0.id] = True
-            # remove_overlap(circle_0, circle_1)
-
-        # elif distance <= (r0 + r1) + buffer and circle_0.collision_hash[circle_1.id] is True:
-        #     pass  # no effect until they seperate
-        #
-        # elif distance > (r0 + r1) +buffer and circle_0.mass is not None and circle_1.mass is not None:
-        #     circle_0.collision_hash[circle_1.id] = False
-        #     circle_1.collision_hash[circle_0.id] = False
+        w0, w1 = weights
+        d_v = -2 * closing / dist_2 * d_center
+        if w0 > 0:
+            circle_0.velocity[:] = circle_0.velocity + w0 * d_v
+        if w1 > 0:
+            circle_1.velocity[:] = circle_1.velocity - w1 * d_v
 
     def _two_circle_velocity_update2(self, circle_0, circle_1, buffer):
 
@@ -570,41 +1316,16 @@ class CollisionDetector:
             dot_p1 = np.inner(-d_velocity, -d_center)
             d_v1 = -2 * (dot_p1 / dist_2) * (-d_center)
             circle_1.coords[2:] += d_v1
-            i = 0
-            while True:
-                circle_1.move()
-                distance = maths.linear_distance(circle_1.center, circle_0.center)
-                if distance > (r0 + r1) + buffer:
-                    break
-
-                if i > self.moves_before_delete:
-                    circle_1.is_finished = True
-                    print('deleted by bounder')
-                    break
-
-                i += 1
+            self.separate_circles(circle_0, circle_1, buffer)
+            return True
 
-        # todo : turn the while loops on circle collision into some kind of function to get rid of the boilerplate
         elif distance <= (r0 + r1) + buffer and circle_1.mass is None:
             d_velocity = v0 - v1
             dot_p0 = np.inner(d_velocity, d_center)
             d_v0 = -2 * (dot_p0 / dist_2) * d_center
             circle_0.coords[2:] += d_v0
-            # remove_overlap_w_no_mass(circle_1, circle_0)
-            i = 0
-            while True:
-                circle_0.move()
-                distance = maths.linear_distance(circle_1.center, circle_0.center)
-
-                if distance > (r0 + r1) + buffer:
-                    break
-
-                if i > self.moves_before_delete:
-                    circle_0.is_finished = True
-                    print('deleted by bounder')
-                    break
-
-                i += 1
+            self.separate_circles(circle_0, circle_1, buffer)
+            return True
 
         elif distance <= (r0 + r1) + buffer:  # and circle_0.collision_hash[circle_1.id] is False:
 
@@ -620,23 +1341,144 @@ class CollisionDetector:
 
             circle_0.coords[2:] += d_v0
             circle_1.coords[2:] += d_v1
+            self.separate_circles(circle_0, circle_1, buffer)
+            return True
+
+        return False
+
+
+class SpatialHash:
+
+    def __init__(self, cell_size=128, buffer=0, swept=False):
+        """
+        uniform grid broad phase for colliding movers. each mover goes into every cell its bounding box touches,
+        so two movers can only collide if they share a cell. update() is incremental: movers that haven't left
+        their cells since the last tick don't get touched
+        Args:
+            cell_size: int
+                width and height of a cell in pixels
+            buffer: int
+                padding added around each mover's bounding box
+            swept: bool, default=False
+                stretch each box to cover where the mover will be after its next step (velocity / ups), so
+                pairs that will collide during the step are found too
+        """
+        self.cell_size = cell_size
+        self.buffer = buffer
+        self.swept = swept
+        self.cells = defaultdict(dict)
+        self._cell_ranges = {}
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def _cell_range(self, item):
+        x, y = item.center
+        half_w = item.width / 2 + self.buffer
+        half_h = item.height / 2 + self.buffer
+        x0, x1, y0, y1 = x, x, y, y
+        if self.swept is True:
+            dx, dy = item.velocity / item.ups
+            x0, x1 = min(x, x + dx), max(x, x + dx)
+            y0, y1 = min(y, y + dy), max(y, y + dy)
+
+        size = self.cell_size
+        return (int((x0 - half_w) // size),
+                int((y0 - half_h) // size),
+                int((x1 + half_w) // size),
+                int((y1 + half_h) // size),
+                )
+
+    def _cells_in(self, cell_range):
+        x0, y0, x1, y1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx, cy
+
+    def insert(self, item):
+        cell_range = self._cell_range(item)
+        self._items[item.id] = item
+        self._cell_ranges[item.id] = cell_range
+        for key in self._cells_in(cell_range):
+            self.cells[key][item.id] = item
+
+    def remove(self, item_id):
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+
+        for key in self._cells_in(self._cell_ranges.pop(item_id)):
+            cell = self.cells[key]
+            del cell[item_id]
+            if len(cell) == 0:
+                del self.cells[key]
+
+    def move(self, item):
+        """
+        re-buckets a single item. does nothing if it's still in the same cells
+        """
+        cell_range = self._cell_range(item)
+        if self._cell_ranges.get(item.id) == cell_range:
+            return
+
+        self.remove(item.id)
+        self.insert(item)
 
-            i = 0
-            while True:
-                circle_0.move()
-                circle_1.move()
-                distance = maths.linear_distance(circle_1.center, circle_0.center)
+    def update(self, items):
+        """
+        syncs the grid with the current list of items. new items get inserted, missing ones removed
+        and the rest re-bucketed if they moved cells
+        Args:
+            items: iterable of movers
+        """
+        live_ids = set()
+        for item in items:
+            live_ids.add(item.id)
+            self.move(item)
 
-                if distance > (r0 + r1) + buffer:
-                    break
+        for item_id in [item_id for item_id in self._items if item_id not in live_ids]:
+            self.remove(item_id)
+
+    def clear(self):
+        self.cells.clear()
+        self._cell_ranges.clear()
+        self._items.clear()
+
+    def nearby(self, item):
+        """
+        everything sharing a cell with item's bounding box. item doesn't need to be in the grid,
+        so it works for things like a face bounding box
+        """
+        found = {}
+        for key in self._cells_in(self._cell_range(item)):
+            found.update(self.cells.get(key, {}))
+        found.pop(getattr(item, 'id', None), None)
+        return list(found.values())
+
+    def pairs(self):
+        """
+        every pair of items that shares at least one cell, each pair once
+
+        Returns:
+            list of (item_0, item_1)
+        """
+        seen = set()
+        pairs = []
+        for cell in self.cells.values():
+            if len(cell) < 2:
+                continue
 
-                if i > self.moves_before_delete:
-                    print('deleted by collision')
-                    circle_1.is_finished = True
-                    circle_0.is_finished = True
-                    break
+            ids = sorted(cell)
+            for a in range(len(ids) - 1):
+                for b in range(a + 1, len(ids)):
+                    key = (ids[a], ids[b])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    pairs.append((cell[ids[a]], cell[ids[b]]))
 
-                i += 1
+        return pairs
 
 
 # todo: Consider adding Hitbox to all assets separately
@@ -677,7 +1519,7 @@ if __name__ == '__main__':
     colors = ColorCycle()
 
     fps_limiter = timers.SmartSleeper(1 / fps)
-    manager = CollidingAssetManager(collisions=True,  move_before_delete=100)
+    manager = CollidingAssetManager(collisions=True)
 
 
     square = shapes.Rectangle((0,0, 120, 30), color='radius', coord_format='cwh')
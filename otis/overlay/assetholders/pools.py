@@ -0,0 +1,100 @@
+"""
+reuses finished movers instead of building new ones mid scene
+"""
+from collections import deque
+
+
+class MoverPool:
+
+    def __init__(self, factory, manager=None, size=0, max_size=None):
+        """
+        keeps finished AssetMovers (and the ImageAssets / masks they hold) around so spawning a new one is just a
+        reset instead of reading the mask from disk, deep copying the asset and allocating new buffers.
+
+        Args:
+            factory: function that builds a new AssetMover. only called when the pool is empty
+            manager: CollidingAssetManager or ArrayAssetManager, optional
+                if given, the manager hands its finished movers back to the pool
+            size: int
+                how many movers to build up front, ie during setup instead of mid scene
+            max_size: int, optional
+                most movers the pool will hold on to. extras are dropped
+
+        Usage: pool = MoverPool(make_ball, manager=manager, size=50)
+               ...
+               manager.append(pool.acquire(center=(x, 50), velocity=(100, np.pi/2)))
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.free = deque()
+        self.n_created = 0
+        self.n_reused = 0
+
+        if manager is not None:
+            self.attach(manager)
+
+        self.fill(size)
+
+    def __len__(self):
+        return len(self.free)
+
+    def attach(self, manager):
+        manager.pool = self
+        return self
+
+    def _new(self):
+        self.n_created += 1
+        return self.factory()
+
+    def fill(self, n):
+        """
+        builds movers until there are n free ones in the pool
+        """
+        while len(self.free) < n:
+            mover = self._new()
+            mover.is_finished = True
+            self.free.append(mover)
+
+    def acquire(self, center=None, velocity=None, velocity_format='mag_radians'):
+        """
+        a ready to go mover. reused from the pool if there's one available, otherwise made by the factory
+
+        Args:
+            center: starting center
+            velocity: starting velocity
+            velocity_format: either 'mag_radians' or 'xy'
+
+        Returns:
+            AssetMover
+        """
+        if len(self.free) > 0:
+            self.n_reused += 1
+            mover = self.free.popleft()
+        else:
+            mover = self._new()
+
+        return mover.reset(center, velocity, velocity_format)
+
+    def release(self, mover):
+        """
+        gives a mover back to the pool. it gets marked as finished so nothing keeps moving / writing it
+        """
+        mover.is_finished = True
+        if self.max_size is not None and len(self.free) >= self.max_size:
+            return
+        self.free.append(mover)
+
+    def collect(self, movers):
+        """
+        releases all the finished movers in movers
+
+        Returns:
+            list of the movers that are still going
+        """
+        living = []
+        for mover in movers:
+            if mover.is_finished is True:
+                self.release(mover)
+            else:
+                living.append(mover)
+        return living
@@ -0,0 +1,174 @@
+"""
+draws a whole batch of sprites onto a frame in one go
+"""
+import cv2
+import numpy as np
+
+from otis.helpers import coordtools
+from otis.helpers.cvtools import blend_premultiplied
+
+
+class SpriteCompositor:
+
+    def __init__(self):
+        """
+        collects (image, mask, center) sprites and draws them all with one write() call. the clipping to the frame is
+        worked out for every sprite at once with numpy, sprites that are completely off screen are skipped, and the
+        masked copies use cv2.copyTo straight into the frame instead of boolean indexing.
+
+        Usage: compositor = SpriteCompositor()
+               while True:
+                    for ball in balls:
+                        compositor.add_asset(ball, image=frame_portion)
+                    compositor.write(frame)  <---- draws and empties the batch
+        """
+        self.images = []
+        self.masks = []
+        self.centers = []
+        self.sizes = []
+        self.borders = []
+        # (asset, image) for sprites whose resize waits until we know they're on screen
+        self._resizes = {}
+        # assets with alpha get blended instead of copied
+        self._alpha_assets = {}
+        self._scratch = None
+        self.n_drawn = 0
+        self.n_skipped = 0
+
+    def __len__(self):
+        return len(self.images)
+
+    def add(self, image, center, mask=None):
+        """
+        queues up a sprite
+
+        Args:
+            image: np.array (h, w, 3)
+            center: absolute (x, y) in the frame
+            mask: bool or uint8 array, optional. non zero where the image gets copied. either (h, w) or (h, w, 3)
+        """
+        self._add(image, image.shape[1::-1], center, mask)
+
+    def _add(self, image, size, center, mask):
+        w, h = size
+        if mask is not None:
+            if mask.dtype == bool:
+                mask = mask.view(np.uint8)
+            # patch up any size mismatch between the image and mask
+            w = min(w, mask.shape[1])
+            h = min(h, mask.shape[0])
+
+        self.images.append(image)
+        self.masks.append(mask)
+        self.centers.append(center)
+        self.sizes.append((int(w), int(h)))
+
+    def add_asset(self, asset, image=None, center=None, dim=None):
+        """
+        queues up an ImageAsset the same way ImageAsset.write would draw it, border included
+
+        Args:
+            asset: imageassets.ImageAsset
+            image: image to use instead of asset.image. gets resized the same as in ImageAsset.write
+            center: absolute (x, y) to draw at instead of the asset's own center
+            dim: frame dimensions, only needed if the asset's ref is a string
+        """
+        if center is None:
+            center = coordtools.absolute_point(asset.center, asset.ref, dim)
+
+        if image is not None and asset.resize_to is not None:
+            # only resize it if it turns out to be on screen
+            self._resizes[len(self.images)] = (asset, image)
+            self._add(None, asset.resize_to, center, asset.mask)
+        else:
+            _image = asset.image if image is None else asset.resize_image(image)
+            self._add(_image, _image.shape[1::-1], center, asset.mask)
+
+        if asset.alpha is not None:
+            k = len(self.images) - 1
+            self._alpha_assets[k] = asset
+            # the alpha replaces the mask
+            self.masks[k] = None
+            w, h = self.sizes[k]
+            self.sizes[k] = (min(w, asset.alpha.shape[1]), min(h, asset.alpha.shape[0]))
+
+        if asset.border is not None:
+            w, h = asset.coords[2:]
+            self.borders.append((len(self.images) - 1, asset.border, (center[0], center[1], w, h)))
+
+    def clear(self):
+        self.images.clear()
+        self.masks.clear()
+        self.centers.clear()
+        self.sizes.clear()
+        self.borders.clear()
+        self._resizes.clear()
+        self._alpha_assets.clear()
+
+    def write(self, frame, clear=True):
+        """
+        draws every queued sprite onto frame in the order they were added. borders go on top of all the sprites
+
+        Args:
+            frame: cv2 frame
+            clear: empties the batch afterwards
+
+        Returns:
+            number of sprites drawn
+        """
+        n = len(self.images)
+        if n == 0:
+            return 0
+
+        frame_wh = np.array(frame.shape[1::-1])
+        sizes = np.array(self.sizes)
+        centers = np.array(self.centers, dtype=float).astype(int)
+
+        # (l, t) and (r, b) of every sprite, then clipped to the frame
+        left_top = centers - sizes // 2
+        right_bottom = left_top + sizes
+        dst_0 = np.clip(left_top, 0, frame_wh)
+        dst_1 = np.clip(right_bottom, 0, frame_wh)
+        src_0 = dst_0 - left_top
+        src_1 = dst_1 - left_top
+        visible = (dst_1 > dst_0).all(axis=1)
+
+        for k in np.nonzero(visible)[0]:
+            x0, y0 = dst_0[k]
+            x1, y1 = dst_1[k]
+            sx0, sy0 = src_0[k]
+            sx1, sy1 = src_1[k]
+
+            image = self.images[k]
+            if image is None:
+                asset, raw_image = self._resizes[k]
+                image = asset.resize_image(raw_image)
+
+            roi = frame[y0:y1, x0:x1]
+            mask = self.masks[k]
+            if k in self._alpha_assets:
+                asset = self._alpha_assets[k]
+                premultiplied = asset.premultiplied(image)[sy0:sy1, sx0:sx1]
+                if self._scratch is None or self._scratch.shape[1] < y1 - y0 or self._scratch.shape[2] < x1 - x0:
+                    self._scratch = np.empty((2, y1 - y0, x1 - x0, 3), dtype=np.uint16)
+                blend_premultiplied(roi, premultiplied, asset.inverse_alpha[sy0:sy1, sx0:sx1], self._scratch)
+                continue
+
+            image = image[sy0:sy1, sx0:sx1]
+            if mask is None:
+                roi[...] = image
+            else:
+                cv2.copyTo(image, mask[sy0:sy1, sx0:sx1], roi)
+
+        for k, border, coords in self.borders:
+            if visible[k]:
+                border.write(frame, coords=coords, ref=None)
+
+        n_drawn = int(visible.sum())
+        self.n_drawn += n_drawn
+        self.n_skipped += n - n_drawn
+
+        if clear is True:
+            self.clear()
+
+        return n_drawn
@@ -7,10 +7,139 @@ import numpy as np
 
 import otis.helpers.cvtools
 import otis.overlay.bases as base
-from otis.helpers import cvtools, misc, coordtools, timers
+from otis.helpers import cvtools, misc, coordtools, timers, dstructures
+from otis.helpers.cvtools import premultiply, blend_premultiplied
 from otis.overlay import bases, shapes
 
 
+class MaskCache(dstructures.LRUCache):
+
+    def __init__(self, max_size=64):
+        """
+        process wide LRU cache of masks, keyed by (path, size). each mask is only read from disk once and each size
+        is only resized / thresholded once, so hundreds of identical sprites share the same read only boolean array.
+
+        Args:
+            max_size: int
+                most entries (decoded files + resized masks) to keep before dropping the least recently used one
+        """
+        super().__init__(max_size)
+
+    def _get(self, key, make):
+        def make_read_only():
+            value = make()
+            value.flags.writeable = False
+            return value
+
+        return self.lookup(key, make_read_only)
+
+    def source(self, path):
+        """
+        the mask file as read by cv2.imread. read only
+        """
+        def read():
+            mask = cv2.imread(path)
+            if mask is None:
+                raise FileNotFoundError(f'could not read mask {path}')
+            return mask
+
+        return self._get((path, None), read)
+
+    def get(self, path, size=None):
+        """
+        boolean mask (True where the mask is dark) resized to size. read only, so copy it if it needs to change
+
+        Args:
+            path: path to the mask file
+            size: (w, h) or None to keep the file's size
+
+        Returns:
+            np.array of bools
+        """
+        size = None if size is None else (int(size[0]), int(size[1]))
+
+        def make():
+            mask = self.source(path)
+            if size is not None and mask.shape[:2] != size[::-1]:
+                mask = cv2.resize(mask, size)
+            return mask < 128
+
+        return self._get((path, size, 'bool'), make)
+
+
+class ResizeMemo:
+
+    def __init__(self):
+        """
+        per frame memo of resized images, shared between ImageAssets. if a bunch of assets stamp the same source
+        image at the same size during a frame, it only gets resized once. entries are keyed by
+        (source identity, generation, size), and the generation goes up every new_frame(), so a source that gets
+        rewritten in place between frames is never served stale.
+
+        Usage: memo = ResizeMemo()
+               balls = [ImageAsset(..., resize_memo=memo) for _ in range(100)]
+               while True:
+                   memo.new_frame()
+                   for ball in balls:
+                       ball.write(frame, frame_portion)  <---- one resize per distinct ball size
+        """
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._memo)
+
+    def new_frame(self):
+        """
+        call once per frame, before the writes
+        """
+        self.generation += 1
+        self._memo.clear()
+
+    def resize(self, image, size, interpolation=cv2.INTER_LINEAR):
+        """
+        cv2.resize(image, size), reusing the result if image was already resized to size this generation
+
+        Args:
+            image: np.array
+            size: (w, h)
+            interpolation: cv2 interpolation flag
+
+        Returns:
+            read only np.array
+        """
+        size = (int(size[0]), int(size[1]))
+        key = (id(image), self.generation, size, interpolation)
+        entry = self._memo.get(key)
+        # the memo holds on to the source, so its id can't be recycled by a different array during the frame
+        if entry is not None and entry[0] is image:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        resized = cv2.resize(image, size, interpolation=interpolation)
+        resized.flags.writeable = False
+        self._memo[key] = (image, resized)
+        return resized
+
+    def stats(self):
+        """
+        Returns:
+            dict with hits, misses and hit_rate
+        """
+        total = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': 0 if total == 0 else self.hits / total,
+                }
+
+
+MASK_CACHE = MaskCache()
+CIRCLE_MASK_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'photo_assets/masks/circle_mask.jpg')
+
+
 class ImageAsset(bases.AssetWriter):
 
     def __init__(self,
@@ -27,6 +156,8 @@ class ImageAsset(bases.AssetWriter):
                  border=False,
                  b_color='radius',
                  b_thickness=1,
+                 resize_memo=None,
+                 alpha=None,
                  ):
         """
         makes the images
@@ -44,13 +175,28 @@ class ImageAsset(bases.AssetWriter):
             use_mask: loads, resizes, and uses a circle mask so only a circle centered at the center of the frame
                              is copied onto the frame. The frame needs to be perfectly square, otherwise, the pose_results can
                              be unstable
+            resize_memo: ResizeMemo, optional
+                shared memo for resizing images passed to write(). only helps when several assets write the same
+                image at the same size in a frame
+            alpha: uint8 alpha mask (h, w), optional. 255 is opaque. the image gets blended onto the frame with
+                premultiplied alpha instead of copied through mask. a 4 channel BGRA image sets this automatically
         """
 
         super().__init__()
+        self.resize_memo = resize_memo
         if isinstance(image, str):
             path_to_dir = os.path.abspath(os.path.dirname(__file__))
             path_to_image = os.path.join(path_to_dir, image)
-            image = cv2.imread(image)
+            image_file = image
+            # keep the alpha channel if there is one
+            image = cv2.imread(image_file, cv2.IMREAD_UNCHANGED)
+            if image is not None and (image.ndim != 3 or image.shape[2] != 4):
+                image = cv2.imread(image_file)
+
+        # split BGRA into the image and its alpha
+        if image is not None and image.ndim == 3 and image.shape[2] == 4:
+            alpha = image[:, :, 3] if alpha is None else alpha
+            image = np.ascontiguousarray(image[:, :, :3])
 
 
         self._image = None
@@ -76,12 +222,17 @@ class ImageAsset(bases.AssetWriter):
             self._image = None
 
         self.mask_bit = mask_bit
+        self._mask_path = None
+        self._alpha = None
+        self._inverse_alpha = None
+        self._premultiplied = None
+        self._premultiplied_source = None
+        self._blend_scratch = None
+        self.alpha = alpha
 
         # loads a saved circlular mask for writing
         if use_mask is True:
-            path_to_dir = os.path.abspath(os.path.dirname(__file__))
-            path_to_mask = os.path.join(path_to_dir, 'photo_assets/masks/circle_mask.jpg')
-            self.mask = cv2.imread(path_to_mask)
+            self.load_mask(CIRCLE_MASK_PATH)
 
         else:
             self.mask = mask
@@ -135,6 +286,8 @@ class ImageAsset(bases.AssetWriter):
         Returns:
             N/A
         """
+        # with copy_updates the new image lands in the old array, which the premultiplied cache can't tell apart
+        self._premultiplied_source = None
         if self._image is None:
             self._image = self.resize_image(new_image)
             return
@@ -164,13 +317,75 @@ class ImageAsset(bases.AssetWriter):
 
     @mask.setter
     def mask(self, new_mask):
+        self._mask_path = None
         if new_mask is None:
             self._mask = None
         else:
             _mask = self.resize_image(new_mask)
-            _mask[_mask < 128] = 1
-            _mask[_mask >= 128] = 0
-            self._mask = _mask.astype(bool)
+            self._mask = _mask < 128
+
+    @property
+    def alpha(self):
+        return self._alpha
+
+    @alpha.setter
+    def alpha(self, new_alpha):
+        """
+        Args:
+            new_alpha: uint8 (h, w) or (h, w, 1), resized to the image. None turns alpha blending off
+        """
+        self._premultiplied = None
+        self._premultiplied_source = None
+        if new_alpha is None:
+            self._alpha = None
+            self._inverse_alpha = None
+            return
+
+        if self._image is not None and new_alpha.shape[:2] != self._image.shape[:2]:
+            new_alpha = cv2.resize(new_alpha, self._image.shape[1::-1])
+        self._alpha = np.ascontiguousarray(new_alpha, dtype=np.uint8).reshape((*new_alpha.shape[:2], 1))
+        self._inverse_alpha = np.repeat(255 - self._alpha, 3, axis=2)
+
+    @property
+    def inverse_alpha(self):
+        """
+        255 - alpha, repeated over the 3 channels
+        """
+        return self._inverse_alpha
+
+    def premultiplied(self, image=None):
+        """
+        image (default self.image) premultiplied by self.alpha. cached, so a sprite that doesn't change only
+        gets premultiplied once.
+
+        the cache is keyed on which array image is, not what's in it. setting self.image or self.alpha clears it,
+        but if you draw into self.image (or an image you keep passing in) in place, call refresh_premultiplied()
+        afterwards or the old pixels keep getting blended
+        """
+        _image = self._image if image is None else image
+        if self._premultiplied_source is not _image:
+            self._premultiplied = premultiply(_image, self._alpha)
+            self._premultiplied_source = _image
+        return self._premultiplied
+
+    def refresh_premultiplied(self):
+        """
+        makes the next write premultiply the image again. see premultiplied()
+        """
+        self._premultiplied = None
+        self._premultiplied_source = None
+
+    def load_mask(self, path):
+        """
+        uses the mask at path, shared through MASK_CACHE instead of reading and resizing a copy for every asset.
+        it follows resize_to from then on. the mask is read only
+
+        Args:
+            path: path to the mask file
+        """
+        self._mask_path = path
+        size = None if self._image is None else self._image.shape[:2][::-1]
+        self._mask = MASK_CACHE.get(path, size)
 
     @property
     def shape(self):
@@ -214,6 +429,14 @@ class ImageAsset(bases.AssetWriter):
             else:
                 self._image = self.resize_image(self._image)
 
+            # cached masks and alpha follow the new size. resize_image sets resize_to on every resize, so only go
+            # back to the cache when the size really changed
+            if getattr(self, '_mask_path', None) is not None and \
+                    (self._mask is None or self._mask.shape[:2] != self._image.shape[:2]):
+                self._mask = MASK_CACHE.get(self._mask_path, self._image.shape[:2][::-1])
+            if getattr(self, '_alpha', None) is not None and self._alpha.shape[:2] != self._image.shape[:2]:
+                self.alpha = self._alpha
+
     def resize_image(self, new_image):
         """
 
@@ -224,7 +447,9 @@ class ImageAsset(bases.AssetWriter):
         if (new_image is None) or (self._image is None) or (new_image.shape[:2] == self._image.shape[:2]):
             return new_image
 
-        if self.resize_to is not None:
+        if self.resize_to is not None and self.resize_memo is not None:
+            image = self.resize_memo.resize(new_image, self.resize_to)
+        elif self.resize_to is not None:
             image = cv2.resize(new_image, self.resize_to)
         elif isinstance(self.scale, (float, int)) and self.scale != 1:
             image = cv2.resize(new_image, (0, 0), fx=self.scale, fy=self.scale)
@@ -255,7 +480,7 @@ class ImageAsset(bases.AssetWriter):
 
         if len(files) > 1:
             mask_file = max(files, key=len)
-            self.mask = cv2.imread(os.path.join(abs_path, mask_file))
+            self.load_mask(os.path.join(abs_path, mask_file))
 
         return self
 
@@ -328,7 +553,17 @@ class ImageAsset(bases.AssetWriter):
             image_portion = image_portion[:y_dim, :x_dim]
             mismatch = True
 
-        if self.mask is not None:
+        if self._alpha is not None:
+            premultiplied = self.premultiplied(_image)[dt: h_i - db + 1, dl: w_i - dr + 1]
+            inverse_alpha = self._inverse_alpha[dt: h_i - db + 1, dl: w_i - dr + 1]
+            if mismatch is True:
+                premultiplied = premultiplied[:y_dim, :x_dim]
+                inverse_alpha = inverse_alpha[:y_dim, :x_dim]
+            if self._blend_scratch is None:
+                self._blend_scratch = np.empty((2, *_image.shape), dtype=np.uint16)
+            blend_premultiplied(frame_portion, premultiplied, inverse_alpha, self._blend_scratch)
+
+        elif self.mask is not None:
             # resize mask
             _mask = self.mask[dt: h_i - db + 1, dl: w_i - dr + 1]
             # check for mismatches
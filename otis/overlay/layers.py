@@ -0,0 +1,329 @@
+"""
+caches static / rarely changing overlays so they aren't redrawn with a pile of cv2 calls every frame
+"""
+import cv2
+import numpy as np
+
+from otis.overlay import bases, shapes
+
+# attributes that get checked every frame to see if an asset needs to be re-rendered
+SIGNATURE_ATTRIBUTES = ('text', 'coords', 'ref', 'color', 'scale', 'thickness', 'x_grid', 'y_grid')
+
+
+def signature(asset):
+    """
+    snapshot of the attributes that change what an asset looks like. groups include the signatures of all the assets
+    they hold
+
+    Args:
+        asset: anything with a write(frame) method
+
+    Returns:
+        tuple
+    """
+    values = []
+    for name in SIGNATURE_ATTRIBUTES:
+        value = getattr(asset, name, None)
+        if isinstance(value, np.ndarray):
+            value = (value.shape, value.tobytes())
+        values.append(value)
+
+    if hasattr(asset, 'assets'):
+        values.append(tuple(signature(a) for a in asset.assets))
+
+    return tuple(values)
+
+
+def _intersection(r0, r1):
+    l = max(r0[0], r1[0])
+    t = max(r0[1], r1[1])
+    r = min(r0[2], r1[2])
+    b = min(r0[3], r1[3])
+    if r <= l or b <= t:
+        return None
+    return l, t, r, b
+
+
+class WriterOutline:
+
+    def __init__(self, writer):
+        """
+        the perma border / background box of a TextWriter or TypeWriter on its own, so it can be cached in an
+        OverlayLayer while the writer keeps typing over the top of it.
+
+        Args:
+            writer: TextWriter or TypeWriter
+        """
+        if isinstance(writer.background, shapes.TransparentBackground):
+            raise ValueError("transparent backgrounds blend with the frame underneath, they can't be cached")
+        self.writer = writer
+
+    @property
+    def coords(self):
+        w = self.writer
+        return tuple(w.coords), w.anchor_point, w.width, w.height
+
+    @property
+    def ref(self):
+        return self.writer.ref
+
+    @property
+    def color(self):
+        w = self.writer
+        return w.back_color, w.b_color
+
+    def write(self, frame):
+        center_coords = self.writer.outline_coords(frame)
+        if isinstance(self.writer.background, bases.RectangleType):
+            self.writer.background.write(frame, coords=center_coords, ref=None)
+        if isinstance(self.writer.border, bases.RectangleType):
+            self.writer.border.write(frame, coords=center_coords, ref=None)
+
+
+class OverlayLayer:
+
+    def __init__(self, dim=None):
+        """
+        renders assets that don't change much (grids, labels, text boxes) once into a premultiplied BGR layer +
+        alpha, then draws the whole layer onto each frame in one go.
+
+        each asset is rendered onto a black and a white canvas. the black render is the premultiplied colour and the
+        difference between the two is its coverage, so anti-aliased edges blend with the frame instead of being baked
+        in against a fixed background. the asset's write gets called twice per render because of this. if nothing
+        on the layer has partial coverage it goes onto the frame with a masked copy, otherwise it gets blended like
+        an anti-aliased TextTile.
+
+        every update the layer checks each asset's signature (text, coords, color etc). when one changes only that
+        asset gets re-rendered, and only the dirty rectangles it used to cover and now covers get rebuilt from the
+        cached renders of the assets in them.
+
+        Args:
+            dim: (w, h) of the frames, optional
+                otherwise it's taken from the first frame written to
+
+        Usage: layer = OverlayLayer().add(screen_grid).add(title_writer)
+               while True:
+                    ...
+                    layer.write(frame)  <---- only re-renders what changed
+
+        assets that draw something new every write without any of their attributes changing (ie InfoWriters with
+        a text_fun) need a signature function: layer.add(writer, signature=writer.text_fun)
+        """
+        self.dim = None if dim is None else tuple(dim)
+        self.assets = []
+        self._signature_funs = []
+        self._signatures = []
+        # ltrb of each asset on the layer (or None if it draws nothing) and the premultiplied BGR, inverse alpha
+        # and mask cropped to it
+        self._rects = []
+        self._crops = []
+        self._dirty = set()
+        self.layer = None
+        self.inverse_alpha = None
+        self.mask = None
+        self.is_blended = False
+        self._black = None
+        self._white = None
+        self._scratch = None
+        self.bounds = None
+        self.n_renders = 0
+        self.n_rebuilt = 0
+
+    def __len__(self):
+        return len(self.assets)
+
+    def add(self, asset, signature=None):
+        """
+        Args:
+            asset: anything with a write(frame) method. AssetGroups, ScreenGrids, TextWriters...
+            signature: function, optional
+                returns something that changes whenever the asset would draw something different. defaults to
+                layers.signature(asset)
+
+        Returns:
+            self
+        """
+        self.assets.append(asset)
+        self._signature_funs.append(signature)
+        self._signatures.append(None)
+        self._rects.append(None)
+        self._crops.append(None)
+        self._dirty.add(len(self.assets) - 1)
+        return self
+
+    def add_outline(self, writer):
+        """
+        caches the border / background box of a writer. the writer stops drawing it itself
+
+        Args:
+            writer: TextWriter or TypeWriter. can't have a transparent background
+
+        Returns:
+            self
+        """
+        self.add(WriterOutline(writer))
+        writer.cached_outline = True
+        return self
+
+    def remove(self, asset):
+        k = self.assets.index(asset)
+        if isinstance(asset, WriterOutline):
+            asset.writer.cached_outline = False
+
+        rect = self._rects[k]
+        for items in (self.assets, self._signature_funs, self._signatures, self._rects, self._crops):
+            del items[k]
+        self._dirty = {i if i < k else i - 1 for i in self._dirty if i != k}
+
+        if rect is not None and self.layer is not None:
+            self._rebuild([rect])
+
+    def mark_dirty(self, asset=None):
+        """
+        forces asset (or every asset if None) to be re-rendered on the next update
+        """
+        if asset is None:
+            self._dirty.update(range(len(self.assets)))
+        else:
+            self._dirty.add(self.assets.index(asset))
+
+    def _allocate(self, dim):
+        w, h = dim
+        self.dim = (w, h)
+        self.layer = np.zeros((h, w, 3), dtype=np.uint8)
+        self.inverse_alpha = np.full((h, w, 3), 255, dtype=np.uint8)
+        self.mask = np.zeros((h, w), dtype=np.uint8)
+        self._black = np.zeros((h, w, 3), dtype=np.uint8)
+        self._white = np.full((h, w, 3), 255, dtype=np.uint8)
+        self._scratch = np.empty((h, w, 3), dtype=np.uint8)
+        self._rects = [None] * len(self.assets)
+        self._crops = [None] * len(self.assets)
+        self.bounds = None
+        self.mark_dirty()
+
+    def _signature(self, k):
+        fun = self._signature_funs[k]
+        return signature(self.assets[k]) if fun is None else fun()
+
+    def _render(self, k):
+        """
+        draws asset k onto the black and white canvases, crops out what it drew and puts the canvases back the way
+        they were
+        """
+        self.assets[k].write(self._black)
+        self.assets[k].write(self._white)
+        self.n_renders += 1
+
+        # over black: a * color, over white: a * color + (1 - a) * 255. so white - black = 255 - a
+        inverse_alpha = cv2.subtract(self._white, self._black)
+        drawn = cv2.bitwise_not(cv2.inRange(inverse_alpha, (255, 255, 255), (255, 255, 255)))
+        x, y, w, h = cv2.boundingRect(drawn)
+        if w == 0 or h == 0:
+            self._rects[k] = None
+            self._crops[k] = None
+            return None
+
+        rect = (x, y, x + w, y + h)
+        inverse_alpha = inverse_alpha[y:y + h, x:x + w].copy()
+        is_blended = not np.isin(inverse_alpha, (0, 255)).all()
+        self._rects[k] = rect
+        self._crops[k] = (self._black[y:y + h, x:x + w].copy(), inverse_alpha, drawn[y:y + h, x:x + w].copy(),
+                          is_blended)
+        self._black[y:y + h, x:x + w] = 0
+        self._white[y:y + h, x:x + w] = 255
+        return rect
+
+    def _rebuild(self, rects):
+        """
+        clears each dirty rectangle on the layer and composites the cached crops that overlap it, in order
+        """
+        for rect in rects:
+            l, t, r, b = rect
+            self.layer[t:b, l:r] = 0
+            self.inverse_alpha[t:b, l:r] = 255
+            self.mask[t:b, l:r] = 0
+            for k, asset_rect in enumerate(self._rects):
+                overlap = _intersection(rect, asset_rect) if asset_rect is not None else None
+                if overlap is None:
+                    continue
+
+                ol, ot, o_r, ob = overlap
+                al, at = asset_rect[:2]
+                src = (slice(ot - at, ob - at), slice(ol - al, o_r - al))
+                image, inverse_alpha, mask = (array[src] for array in self._crops[k][:3])
+                layer = self.layer[ot:ob, ol:o_r]
+                layer_inverse_alpha = self.inverse_alpha[ot:ob, ol:o_r]
+                # premultiplied "over" of the crop onto what's already on the layer. exact where the crop is
+                # fully opaque or fully clear
+                cv2.multiply(layer, inverse_alpha, dst=layer, scale=1 / 255)
+                cv2.add(layer, image, dst=layer)
+                cv2.multiply(layer_inverse_alpha, inverse_alpha, dst=layer_inverse_alpha, scale=1 / 255)
+                cv2.bitwise_or(self.mask[ot:ob, ol:o_r], mask, dst=self.mask[ot:ob, ol:o_r])
+
+            self.n_rebuilt += 1
+
+        rects = [r for r in self._rects if r is not None]
+        if len(rects) == 0:
+            self.bounds = None
+        else:
+            rects = np.array(rects)
+            self.bounds = (*rects[:, :2].min(axis=0), *rects[:, 2:].max(axis=0))
+        self.is_blended = any(crop[3] for crop in self._crops if crop is not None)
+
+    def update(self, dim=None):
+        """
+        re-renders any assets whose signature changed and rebuilds the dirty parts of the layer
+
+        Args:
+            dim: (w, h) of the frame. if it doesn't match the layer, the layer gets rebuilt from scratch
+
+        Returns:
+            list of the dirty ltrb rectangles
+        """
+        if dim is not None and tuple(dim) != self.dim:
+            self._allocate(dim)
+        elif self.layer is None:
+            if self.dim is None:
+                raise ValueError("OverlayLayer needs dim or a frame before it can render")
+            self._allocate(self.dim)
+
+        for k in range(len(self.assets)):
+            sig = self._signature(k)
+            if sig != self._signatures[k]:
+                self._signatures[k] = sig
+                self._dirty.add(k)
+
+        if len(self._dirty) == 0:
+            return []
+
+        dirty_rects = []
+        for k in sorted(self._dirty):
+            old_rect = self._rects[k]
+            new_rect = self._render(k)
+            # renders can change attributes (ie TextWriter.write(text=...)), so take the signature afterwards
+            self._signatures[k] = self._signature(k)
+            for rect in (old_rect, new_rect):
+                if rect is not None:
+                    dirty_rects.append(rect)
+
+        self._dirty.clear()
+        self._rebuild(dirty_rects)
+        return dirty_rects
+
+    def write(self, frame):
+        """
+        updates the layer then draws it onto frame in one go
+        """
+        self.update(frame.shape[1::-1])
+        if self.bounds is None:
+            return
+
+        l, t, r, b = self.bounds
+        roi = frame[t:b, l:r]
+        if self.is_blended is True:
+            # same blend as an anti-aliased TextTile, frame * (255 - alpha) / 255 + premultiplied colour
+            scratch = self._scratch[t:b, l:r]
+            cv2.multiply(roi, self.inverse_alpha[t:b, l:r], dst=scratch, scale=1 / 255)
+            cv2.add(scratch, self.layer[t:b, l:r], dst=roi)
+        else:
+            cv2.copyTo(self.layer[t:b, l:r], self.mask[t:b, l:r], roi)
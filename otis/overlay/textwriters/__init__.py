@@ -1,4 +1,5 @@
 from otis.overlay.textwriters.textwriters import *
 from otis.overlay.textwriters.typewriters import *
 from otis.overlay.textwriters.utilitywriters import *
-from otis.overlay.textwriters.texttools import *
\ No newline at end of file
+from otis.overlay.textwriters.texttools import *
+from otis.overlay.textwriters.texttiles import *
\ No newline at end of file
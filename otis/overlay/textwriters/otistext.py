@@ -17,8 +17,13 @@ from otis.overlay import bases, shapes, textwriters
 class OtisText:
     """
     OtisText is a bookkeeping object that calculates stubs and anchor points for text. It's used internally
-    by text writers to simplify the organization of those objects
+    by text writers to simplify the organization of those objects.
+
+    It's immutable and hashable by its text and style, so identical text can share one compiled layout, see
+    OtisTextCache / TEXT_LAYOUTS
     """
+    # jtypes with precomputed offsets
+    jtypes = ('l', 'c_spirals', 'radius')
 
     def __init__(self,
                  text="",
@@ -49,24 +54,25 @@ class OtisText:
         self.max_lines = max_lines
         self.line_spacing = line_spacing
         self.thickness = thickness
-
-        self.stubs = textwriters.split_text_into_stubs(text,
-                                                       max_line_length=self.max_line_length,
-                                                       n_lines=self.max_lines,
-                                                       line_length_format=self.line_length_format,
-                                                       font=self.font,
-                                                       scale=self.scale,
-                                                       thickness=self.thickness,
-                                                       )
-        self.stubs
+        self.key = (text, anchor_point, self.font, scale, thickness, line_spacing, max_line_length,
+                    line_length_format, max_lines, perma_border)
+
+        self.stubs = tuple(textwriters.split_text_into_stubs(text,
+                                                             max_line_length=self.max_line_length,
+                                                             n_lines=self.max_lines,
+                                                             line_length_format=self.line_length_format,
+                                                             font=self.font,
+                                                             scale=self.scale,
+                                                             thickness=self.thickness,
+                                                             ))
         self.n_stubs = len(self.stubs)
+        self.line_widths = tuple(self.get_text_size(stub)[0] for stub in self.stubs)
 
         if self.line_length_format != 'pixels' or self.max_line_length is None:
-            self.width = max([self.get_text_size(stub)[0] for stub in self.stubs])
+            self.width = max(self.line_widths)
         else:
             self.width = self.max_line_length
 
-
         self.font_height = self.get_text_size('T')[1]
 
         if max_lines is not None and perma_border is True:
@@ -74,9 +80,36 @@ class OtisText:
         else:
             self.height = self.n_stubs * self.font_height + (self.n_stubs - 1) * self.line_spacing
 
+        # horizontal offset of each stub inside the text box for each jtype
+        self.justified_offsets = types.MappingProxyType(
+            {'l': tuple(0 for _ in self.line_widths),
+             'c_spirals': tuple((self.width - w) // 2 for w in self.line_widths),
+             'radius': tuple(self.width - w for w in self.line_widths),
+             })
+
+        if self.anchor_point is None:
+            self.bounding_box = (0, 0, self.width, self.height)
+        else:
+            self.bounding_box = tuple(coordtools.translate_box_coords((0, 0, self.width, self.height),
+                                                                      in_format=self._coord_format,
+                                                                      out_format='ltrb',
+                                                                      ))
+
         self.start_offset = self.get_cv2_start_from_anchor()
+        self.start_offset.flags.writeable = False
         self.next_line_offset = self.font_height + self.line_spacing
+        self._frozen = True
 
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False) is True:
+            raise AttributeError("OtisText is immutable, make a new one (or use TEXT_LAYOUTS.get) instead")
+        super().__setattr__(name, value)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, OtisText) and self.key == other.key
 
     def get_text_size(self, text):
         """
@@ -86,7 +119,14 @@ class OtisText:
         Returns: tuple
                 (text_width, text_height)
         """
-        return cv2.getTextSize(text, self.font, self.scale, self.thickness)[0]
+        return textwriters.TEXT_METRICS.size(text, self.font, self.scale, self.thickness)
+
+    def offsets(self, jtype='l'):
+        """
+        horizontal offset of each stub for the justification type. anything that isn't 'c_spirals' or 'radius' is
+        left justified
+        """
+        return self.justified_offsets.get(jtype, self.justified_offsets['l'])
 
     def get_cv2_start_from_anchor(self):
         if self.anchor_point is None:
@@ -113,3 +153,44 @@ class OtisText:
             stub_queue.put(stub)
 
         return stub_queue
+
+
+class OtisTextCache(dstructures.LRUCache):
+
+    def __init__(self, max_size=256):
+        """
+        process wide LRU cache of OtisText layouts keyed by text and style. re-assigning or looping the same text,
+        or several writers showing the same text, all share one layout instead of re-splitting and re-measuring it
+
+        Args:
+            max_size: int
+                most layouts to keep before dropping the least recently used one
+
+        Usage: text_object = TEXT_LAYOUTS.get("hello", font='duplex', scale=1.5, max_line_length=500)
+        """
+        super().__init__(max_size)
+
+    def get(self,
+            text="",
+            anchor_point=None,
+            font='duplex',
+            scale=1,
+            thickness=1,
+            line_spacing=.5,
+            max_line_length=None,
+            line_length_format='pixels',
+            max_lines=None,
+            perma_border=False
+            ):
+        """
+        same arguments as OtisText
+
+        Returns:
+            OtisText
+        """
+        key = (text, anchor_point, textwriters.FONT_HASH[font], scale, thickness, line_spacing, max_line_length,
+               line_length_format, max_lines, perma_border)
+        return self.lookup(key, lambda: OtisText(*key))
+
+
+TEXT_LAYOUTS = OtisTextCache()
@@ -0,0 +1,279 @@
+"""
+pre-rendered lines of text so writers don't have to cv2.putText the same line every frame
+"""
+import threading
+
+import cv2
+import numpy as np
+
+from otis.helpers import dstructures
+from otis.helpers.cvtools import premultiply
+from otis.overlay.textwriters.texttools import TEXT_METRICS
+
+
+class TextTile:
+
+    def __init__(self, text, font, scale, thickness, color, ltype):
+        """
+        one line of text rasterized once. the tile is cropped to exactly the pixels cv2.putText would touch.
+
+        if the coverage has any partial pixels (anti-aliased text, and some cv2 builds smooth text whatever the ltype)
+        it's kept as an alpha channel and the tile is blended in, otherwise it's a plain masked copy. blended edges
+        can come out 1 level off what cv2.putText gives, since the colour is premultiplied and rounded up front
+
+        Args:
+            text: str
+            font: cv2 font
+            scale: float
+            thickness: int
+            color: (B, G, R)
+            ltype: cv2 line type
+        """
+        (w, h), baseline = TEXT_METRICS.text_size(text, font, scale, thickness)
+        self.text_size = (w, h)
+        self.baseline = baseline
+
+        # hershey strokes can poke out past getTextSize by about the thickness
+        pad = thickness + 2
+        coverage = np.zeros((h + baseline + 2 * pad, w + 2 * pad), dtype=np.uint8)
+        cv2.putText(coverage, text, (pad, pad + h), font, scale, 255, thickness, ltype)
+
+        x, y, tw, th = cv2.boundingRect(coverage)
+        # where the top left of the tile sits relative to the cv2 text origin (left end of the baseline)
+        self.offset = (x - pad, y - pad - h)
+        self.mask = coverage[y:y + th, x:x + tw]
+        self.is_blended = not np.isin(self.mask, (0, 255)).all()
+
+        self.image = np.empty((th, tw, 3), dtype=np.uint8)
+        self.image[...] = color
+        if self.is_blended is True:
+            alpha = self.mask[..., None]
+            self.image = premultiply(self.image, alpha)
+            self.inverse_alpha = np.repeat(255 - alpha, 3, axis=2)
+        else:
+            self.inverse_alpha = None
+
+        for array in (self.image, self.mask, self.inverse_alpha):
+            if array is not None:
+                array.flags.writeable = False
+
+    @property
+    def nbytes(self):
+        n = self.image.nbytes + self.mask.nbytes
+        return n if self.inverse_alpha is None else n + self.inverse_alpha.nbytes
+
+    def write(self, frame, pos, scratch=None):
+        """
+        draws the tile where cv2.putText(frame, text, pos, ...) would, to within 1 level on anti-aliased edges
+
+        Args:
+            frame: cv2 frame
+            pos: (x, y) cv2 text origin, ie the left end of the baseline
+            scratch: uint8 array of shape (>=h, >=w, 3) for the alpha blend, optional
+        """
+        th, tw = self.mask.shape
+        x0 = int(pos[0]) + self.offset[0]
+        y0 = int(pos[1]) + self.offset[1]
+        fh, fw = frame.shape[:2]
+
+        # clip to the frame
+        l, t = max(x0, 0), max(y0, 0)
+        r, b = min(x0 + tw, fw), min(y0 + th, fh)
+        if r <= l or b <= t:
+            return
+
+        roi = frame[t:b, l:r]
+        src = (slice(t - y0, b - y0), slice(l - x0, r - x0))
+        if self.is_blended is True:
+            h, w = roi.shape[:2]
+            scratch = np.empty_like(roi) if scratch is None else scratch[:h, :w]
+            # premultiplied "over", same as cvtools.blend_premultiplied but cv2's saturating ops are quicker on
+            # tiles this small
+            cv2.multiply(roi, self.inverse_alpha[src], dst=scratch, scale=1 / 255)
+            cv2.add(scratch, self.image[src], dst=roi)
+        else:
+            cv2.copyTo(self.image[src], self.mask[src], roi)
+
+
+class LineBuffer(TextTile):
+
+    def __init__(self, font, scale=1, thickness=1, ltype=1):
+        """
+        off-screen buffer for a line of text that's being typed out one character at a time. only the characters
+        added since the last update get drawn into it, everything already typed stays put, then it's blended onto
+        the frame like any other TextTile.
+
+        Args:
+            font: cv2 font
+            scale: float
+            thickness: int
+            ltype: cv2 line type
+
+        Usage: buffer.reset(stub, color)
+               while typing:
+                    buffer.update(typed_so_far)
+                    buffer.write(frame, pos)
+        """
+        self.font = font
+        self.scale = scale
+        self.thickness = thickness
+        self.ltype = ltype
+        self.advances = TEXT_METRICS.advances(font, scale, thickness)
+        self.text = ''
+        self.color = None
+        self.pen = 0.
+        self.is_blended = True
+        self.n_glyphs = 0
+        # empty until the first reset, so write / nbytes still work on a fresh buffer
+        self._coverage = np.zeros((0, 0), dtype=np.uint8)
+        self._premultiplied = np.zeros((0, 0, 3), dtype=np.uint8)
+        self._inverse_alpha = np.zeros((0, 0, 3), dtype=np.uint8)
+        self._pad = 0
+        self._height = 0
+        self.offset = (0, 0)
+        self._right = 0
+        self._crop()
+
+    @property
+    def key(self):
+        return self.font, self.scale, self.thickness, self.ltype
+
+    def reset(self, line='', color=(255, 255, 255)):
+        """
+        empties the buffer and makes sure it's big enough to hold line
+
+        Args:
+            line: the whole line that'll be typed out
+            color: (B, G, R)
+        """
+        (w, h), _ = TEXT_METRICS.text_size(line + 'T', self.font, self.scale, self.thickness)
+        # deepest descender in the font
+        baseline = TEXT_METRICS.text_size('gjpqy_', self.font, self.scale, self.thickness)[1]
+        pad = self.thickness + 2
+        shape = (h + baseline + 2 * pad, w + 2 * pad)
+
+        if self._coverage.shape != shape:
+            self._coverage = np.zeros(shape, dtype=np.uint8)
+            self._premultiplied = np.zeros((*shape, 3), dtype=np.uint8)
+            self._inverse_alpha = np.full((*shape, 3), 255, dtype=np.uint8)
+        else:
+            self._coverage[:, :self._right] = 0
+            self._premultiplied[:, :self._right] = 0
+            self._inverse_alpha[:, :self._right] = 255
+
+        self._pad = pad
+        self._height = h
+        self.offset = (-pad, -pad - h)
+        self.text = ''
+        self.pen = 0.
+        self.color = tuple(int(c) for c in color)
+        self._right = 0
+        self._crop()
+        return self
+
+    def _crop(self):
+        self.mask = self._coverage[:, :self._right]
+        self.image = self._premultiplied[:, :self._right]
+        self.inverse_alpha = self._inverse_alpha[:, :self._right]
+
+    def update(self, text, color=None):
+        """
+        draws whatever has been added onto the end of text since the last update. starts over if text isn't just
+        the old text with more on the end, or the color changed
+
+        Args:
+            text: str
+                the line typed so far
+            color: (B, G, R), optional
+        """
+        color = self.color if color is None else tuple(int(c) for c in color)
+        if self._coverage.size == 0 or color != self.color or not text.startswith(self.text):
+            self.reset(text, color)
+
+        new_text = text[len(self.text):]
+        if new_text == '':
+            return self
+
+        if round(self._pad * 2 + self.pen + self.advances.advance(new_text)) + 1 > self._coverage.shape[1]:
+            # outgrew the buffer, ie the text was never reset to its full line
+            self.reset(text, color)
+            new_text = text
+
+        left = self._coverage.shape[1]
+        for char in new_text:
+            x = round(self._pad + self.pen)
+            cv2.putText(self._coverage, char, (x, self._pad + self._height), self.font, self.scale, 255,
+                        self.thickness, self.ltype)
+            left = min(left, x - self._pad)
+            self.pen += self.advances[char]
+            self.n_glyphs += 1
+
+        right = min(round(self._pad * 2 + self.pen + self.advances.overhangs[new_text[-1]]) + 1,
+                    self._coverage.shape[1])
+        left = max(left, 0)
+        # only the columns the new glyphs touched need their colour / alpha worked out again
+        coverage = self._coverage[:, left:right, None]
+        color_block = np.empty((*coverage.shape[:2], 3), dtype=np.uint8)
+        color_block[...] = color
+        self._premultiplied[:, left:right] = premultiply(color_block, coverage)
+        np.subtract(255, coverage, out=self._inverse_alpha[:, left:right], casting='unsafe')
+
+        self.text = text
+        self._right = max(self._right, right)
+        self._crop()
+        return self
+
+
+class TextTileCache(dstructures.LRUCache):
+
+    def __init__(self, max_size=256):
+        """
+        process wide LRU cache of TextTiles keyed by (text, font, scale, thickness, color, ltype). a line that shows
+        up every frame is rasterized once and then just copied onto the frame.
+
+        Args:
+            max_size: int
+                most tiles to keep before dropping the least recently used one
+
+        Usage: TEXT_TILES.write(frame, 'hello', (50, 50), cv2.FONT_HERSHEY_DUPLEX, (0, 255, 0))
+        """
+        super().__init__(max_size)
+        # each thread gets its own scratch buffer for the blends
+        self._local = threading.local()
+
+    def get(self, text, font, scale=1, thickness=1, color=(255, 255, 255), ltype=1):
+        """
+        Returns:
+            TextTile
+        """
+        key = (text, font, float(scale), int(thickness), tuple(int(c) for c in color), ltype)
+        return self.lookup(key, lambda: TextTile(text, font, scale, thickness, key[4], ltype))
+
+    def write(self, frame, text, pos, font, color, scale=1, thickness=1, ltype=1):
+        """
+        drop in for cv2.putText(frame, text, pos, font, scale, color, thickness, ltype), see TextTile.write
+
+        Returns:
+            the TextTile that was drawn
+        """
+        tile = self.get(text, font, scale, thickness, color, ltype)
+        scratch = None
+        if tile.is_blended is True:
+            h, w = tile.mask.shape
+            scratch = getattr(self._local, 'scratch', None)
+            if scratch is None or scratch.shape[0] < h or scratch.shape[1] < w:
+                scratch = self._local.scratch = np.empty((h, w, 3), dtype=np.uint8)
+        tile.write(frame, pos, scratch)
+        return tile
+
+    def stats(self):
+        """
+        Returns:
+            dict with hits, misses, hit_rate, size and nbytes
+        """
+        stats = super().stats()
+        stats['nbytes'] = sum(tile.nbytes for tile in self.values())
+        return stats
+
+
+TEXT_TILES = TextTileCache()
@@ -1,6 +1,6 @@
 import cv2
 
-from otis.helpers import coordtools
+from otis.helpers import coordtools, dstructures
 
 __fonts = (cv2.FONT_HERSHEY_SIMPLEX,
            cv2.FONT_HERSHEY_PLAIN,
@@ -16,9 +16,126 @@ __keys = ('simplex', 'plain', 'duplex', 'complex', 'triplex', 'c_small', 's_simp
 
 FONT_HASH = dict(zip(__keys + __fonts, __fonts + __fonts))
 
+class CharAdvances(dict):
+
+    def __init__(self, font, scale, thickness):
+        """
+        how far along each character moves the pen for one font / scale / thickness, filled in one character at a
+        time as they show up. cv2 text is a run of glyphs, so a string is as wide as the advances of all its
+        characters plus however far the last glyph pokes out past its own advance
+
+        Args:
+            font: cv2 font
+            scale: float
+            thickness: int
+        """
+        super().__init__()
+        self.font = font
+        self.scale = scale
+        self.thickness = thickness
+        # how far each glyph sticks out past its advance
+        self.overhangs = {}
+        # summed advances of whole words, so wrapping the same script again doesn't add them up again
+        self.words = {}
+
+    def _measure(self, text):
+        return cv2.getTextSize(text, self.font, self.scale, self.thickness)[0][0]
+
+    def __missing__(self, char):
+        # a long run of the character averages out cv2's rounding
+        single = self._measure(char)
+        advance = (self._measure(char * 17) - single) / 16
+        self[char] = advance
+        self.overhangs[char] = single - advance
+        return advance
+
+    def advance(self, word):
+        """
+        summed advances of the characters in word
+        """
+        advance = self.words.get(word)
+        if advance is None:
+            if len(self.words) > 4096:
+                self.words.clear()
+            advance = self.words[word] = sum(self[char] for char in word)
+        return advance
+
+    def width(self, text):
+        """
+        pixel width of text, same as cv2.getTextSize
+        """
+        if text == '':
+            return self._measure(text)
+        width = sum(self[char] for char in text)
+        return int(round(width + self.overhangs[text[-1]]))
+
+
+class TextMetrics(dstructures.LRUCache):
+
+    def __init__(self, max_size=4096):
+        """
+        process wide LRU memo of cv2.getTextSize keyed by (text, font, scale, thickness) plus a CharAdvances table
+        per (font, scale, thickness), so the same strings aren't measured over and over every frame
+
+        Args:
+            max_size: int
+                most measured strings to keep before dropping the least recently used one
+
+        Usage: w, h = TEXT_METRICS.size('hello', 'duplex', 1.5, 2)
+               w = TEXT_METRICS.width('a long line that needs wrapping', 'duplex', 1.5, 2)
+        """
+        super().__init__(max_size)
+        self._advances = {}
+
+    def text_size(self, text, font='simplex', scale=1, thickness=1):
+        """
+        same as cv2.getTextSize, ie ((w, h), baseline), but only measured once
+        """
+        key = (text, FONT_HASH[font], scale, thickness)
+        return self.lookup(key, lambda: cv2.getTextSize(text, key[1], scale, thickness))
+
+    def size(self, text, font='simplex', scale=1, thickness=1):
+        """
+        (w, h) of text
+        """
+        return self.text_size(text, font, scale, thickness)[0]
+
+    def advances(self, font='simplex', scale=1, thickness=1):
+        """
+        CharAdvances table for the font, scale and thickness
+        """
+        key = (FONT_HASH[font], scale, thickness)
+        table = self._advances.get(key)
+        if table is None:
+            table = self._advances.setdefault(key, CharAdvances(*key))
+        return table
+
+    def width(self, text, font='simplex', scale=1, thickness=1):
+        """
+        width of text worked out from the advance table instead of measuring the whole string. good for strings
+        that are only measured once or twice, ie while wrapping text
+        """
+        return self.advances(font, scale, thickness).width(text)
+
+    def clear(self):
+        super().clear()
+        self._advances.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict with hits, misses, hit_rate, size and the number of advance tables
+        """
+        stats = super().stats()
+        stats['n_tables'] = len(self._advances)
+        return stats
+
+
+TEXT_METRICS = TextMetrics()
+
+
 def get_text_size(text, font='simplex', scale=1, thickness=None):
-    _font = FONT_HASH[font]
-    return cv2.getTextSize(text, _font, scale, thickness)[0]
+    return TEXT_METRICS.size(text, font, scale, thickness)
 
 def find_justified_start(text, coords, font, scale=1, thickness=1, jtype='l', ref=None, dim=None):
     """
@@ -34,9 +151,7 @@ def find_justified_start(text, coords, font, scale=1, thickness=1, jtype='l', re
     Returns:
 
     """
-    _font = FONT_HASH[font]
-
-    w, h = cv2.getTextSize(text, _font, scale, thickness)[0]
+    w, h = TEXT_METRICS.size(text, font, scale, thickness)
     if jtype == 'radius':
         justified_start =  (int(coords[0] - w), coords[1])
 
@@ -78,7 +193,88 @@ def split_text_into_stubs(text,
     return lines_of_text
 
 
-def split_text_into_lines_pixels(text, font=None, max_pixels_per_line=None, scale=1, thickness=None, max_lines=None):
+def fill_lines(words, advances, max_width, method='greedy'):
+    """
+    works out where to break a list of words into lines no wider than max_width. each word is measured once and
+    line widths come from prefix sums, so it's linear in the number of words
+
+    Args:
+        words: list of str, no spaces in them
+        advances: CharAdvances for the font / scale / thickness the words get written in
+        max_width: int
+            pixels
+        method: str
+            'greedy' puts as many words as will fit on each line. 'balanced' spreads them out to keep the line
+            lengths even (minimum raggedness, ie the smallest sum of squared leftover space on all but the last line)
+
+    Returns:
+        list of (start, stop) word indices for each line
+    """
+    n = len(words)
+    space = advances[' ']
+    # prefix[k] = advance of words[:k] with a space after each word
+    prefix = [0.]
+    total = 0.
+    for word in words:
+        total += advances.advance(word) + space
+        prefix.append(total)
+    overhangs = [advances.overhangs[word[-1]] - space for word in words]
+
+    def width(i, j):
+        return round(prefix[j] - prefix[i] + overhangs[j - 1])
+
+    for i in range(n):
+        if width(i, i + 1) > max_width:
+            raise RuntimeError("max_pixels_per_line is too small relative to character size. "
+                               f"'{words[i]}' is longer than the specified maximum number of pixels per line")
+
+    if method == 'greedy':
+        breaks = []
+        i = 0
+        while i < n:
+            start = prefix[i]
+            j = i + 1
+            while j < n and round(prefix[j + 1] - start + overhangs[j]) <= max_width:
+                j += 1
+            breaks.append((i, j))
+            i = j
+        return breaks
+
+    elif method == 'balanced':
+        # costs[i] = least raggedness for words[i:], next_break[i] = where the line starting at i should end
+        costs = [0.] * (n + 1)
+        next_break = [n] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            costs[i] = float('inf')
+            j = i + 1
+            while j <= n:
+                w = width(i, j)
+                if w > max_width:
+                    break
+                cost = costs[j] + (0 if j == n else (max_width - w) ** 2)
+                if cost < costs[i]:
+                    costs[i] = cost
+                    next_break[i] = j
+                j += 1
+
+        breaks = []
+        i = 0
+        while i < n:
+            breaks.append((i, next_break[i]))
+            i = next_break[i]
+        return breaks
+
+    else:
+        raise ValueError("method must be 'greedy' or 'balanced'")
+
+
+def split_text_into_lines_pixels(text,
+                                 font=None,
+                                 max_pixels_per_line=None,
+                                 scale=1,
+                                 thickness=None,
+                                 max_lines=None,
+                                 method='greedy'):
     """
     breaks text into lines whose length is less than or equal to max_pixels_per line
     Args:
@@ -93,6 +289,10 @@ def split_text_into_lines_pixels(text, font=None, max_pixels_per_line=None, scal
 
         scale:
         thickness:
+        max_lines: int or None
+            anything past max_lines gets tacked onto the last line
+        method: str
+            'greedy' or 'balanced', see fill_lines
 
     Returns:
         list of lines
@@ -102,36 +302,17 @@ def split_text_into_lines_pixels(text, font=None, max_pixels_per_line=None, scal
     if max_pixels_per_line is None:
         return [text]
 
-    _font = FONT_HASH[font]
-
-    text_length = cv2.getTextSize(text, _font, scale, thickness)[0][0]
-    lines_of_text = []
-
-    while text_length > max_pixels_per_line:
-
-        split_position = int(max_pixels_per_line / text_length * len(text))
-        split_proposal = text[:split_position + 1]
-        # break at last space in the shortened line
-        for i in range(split_position + 1):
-            if split_proposal[-1 - i] == ' ':
-                break
-        line = split_proposal[:split_position - i]
-
-        if line == '':
-            raise RuntimeError("max_pixels_per_line is too small relative to character size. "
-                               "There are individual words in the text that are longer "
-                               "than the specified maximum number of pixels per line")
+    words = [word for word in text.split(' ') if word != '']
+    if len(words) == 0:
+        return [text.strip(' ')]
 
-        lines_of_text.append(line)
-        text = text[split_position - i:].strip(' ')
-        text_length = cv2.getTextSize(text, _font, scale, thickness)[0][0]
+    advances = TEXT_METRICS.advances(font, scale, thickness)
+    breaks = fill_lines(words, advances, max_pixels_per_line, method)
 
-    lines_of_text.append(text)
-    if max_lines is not None and len(lines_of_text) > max_lines:
-        last_line = " " + " ".join(lines_of_text[max_lines - 1:])
-        lines_of_text = lines_of_text[:max_lines-1].append(last_line)
+    if max_lines is not None and len(breaks) > max_lines:
+        breaks = breaks[:max_lines - 1] + [(breaks[max_lines - 1][0], len(words))]
 
-    return lines_of_text
+    return [' '.join(words[i:j]) for i, j in breaks]
 
 def split_text_into_lines_chars(text, max_character_per_line=None, max_lines=None):
     """
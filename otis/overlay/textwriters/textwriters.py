@@ -13,6 +13,7 @@ from otis.overlay import bases, shapes
 from otis.overlay.textwriters import otistext
 from otis.overlay.shapes import shapefunctions
 from otis.overlay.textwriters import texttools
+from otis.overlay.textwriters import texttiles
 
 # todo - texttxt writer perma border doesn't work without one border turned on
 class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
@@ -54,6 +55,8 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
                  back_color=None,
                  invert_background=False,
                  # for multiple lines, makes it so there is one big background/border
+                 ##################### rendering #####################################
+                 tile_cache=texttiles.TEXT_TILES,
                  ):
         """
 
@@ -107,9 +110,13 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
                 between 0 and 1 or None, makes background grey transparent
             perma_border: bool
                 border doesn't disappoint when there's no text
+            tile_cache: texttiles.TextTileCache or None
+                lines get rasterized once into the cache and copied onto the frame after that. None puts the text
+                on with cv2.putText every frame
         """
 
         super().__init__()
+        self.tile_cache = tile_cache
         self.thickness = thickness
         self.font = font  # property
         self.color = color  # property
@@ -204,6 +211,8 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
         self._output = ""
         self.completed_stubs = []
         self.cursor = None
+        # True when an OverlayLayer draws the one/perma border box instead
+        self.cached_outline = False
 
     ############################# PROPERTIES ##########################################################
     @property
@@ -236,17 +245,17 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
         if new_text is None:
             new_text = ""
 
-        self.text_object = otistext.OtisText(new_text,
-                                             anchor_point=self.anchor_point,
-                                             font=self.font,
-                                             scale=self.scale,
-                                             thickness=self.thickness,
-                                             line_spacing=self.line_spacing,
-                                             max_line_length=self.max_line_length,
-                                             line_length_format=self.line_length_format,
-                                             max_lines=self.n_lines,
-                                             perma_border=self.perma_border
-                                             )
+        self.text_object = otistext.TEXT_LAYOUTS.get(new_text,
+                                                     anchor_point=self.anchor_point,
+                                                     font=self.font,
+                                                     scale=self.scale,
+                                                     thickness=self.thickness,
+                                                     line_spacing=self.line_spacing,
+                                                     max_line_length=self.max_line_length,
+                                                     line_length_format=self.line_length_format,
+                                                     max_lines=self.n_lines,
+                                                     perma_border=self.perma_border
+                                                     )
 
     @property
     def height(self):
@@ -299,17 +308,33 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
         else:
             raise ValueError("line_spacing must either be int or float")
 
+    def outline_coords(self, frame, coords=None, ref=None):
+        """
+        cwh coords of the one / perma border box
+        """
+        _coords = self.coords if coords is None else coords
+        _ref = self.ref if ref is None else ref
+        _coords = coordtools.absolute_point(_coords, _ref, frame)
+        return coordtools.translate_box_coords((*_coords, self.width, self.height),
+                                               in_format=self.anchor_point + 'wh',
+                                               out_format='cwh',
+                                               )
+
     def get_text_size(self, text=None):
         _text = self.text if text is None else text
-        return cv2.getTextSize(_text, self.font, self.scale, self.thickness)[0]
+        return texttools.TEXT_METRICS.size(_text, self.font, self.scale, self.thickness)
 
     ################################## METHODS #############################################
-    def _write_line_of_text(self, frame, text, coords=None, color=None, show_outline=True):
+    def _write_line_of_text(self, frame, text, coords=None, color=None, show_outline=True, text_size=None,
+                            line_buffer=None):
         """
         :type frame: np.array
+        text_size: (w, h) of text if it's already known
+        line_buffer: texttiles.LineBuffer holding the start of text already drawn. whatever's left of text after
+            line_buffer.text (ie the cursor) gets written after it
         """
         h_space, v_space = self.border_spacing
-        w, h = self.get_text_size(text)
+        w, h = self.get_text_size(text) if text_size is None else text_size
         # write border
         l = coords[0] - h_space
         b = coords[1] + v_space
@@ -335,16 +360,36 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
                                  ref=coords,
                                  )
 
-        shapefunctions.write_text(frame,
+        if line_buffer is None:
+            self._put_text(frame, text, coords, color)
+        else:
+            line_buffer.write(frame, coords)
+            rest = text[len(line_buffer.text):]
+            if rest.strip() != '':
+                self._put_text(frame, rest, (coords[0] + round(line_buffer.pen), coords[1]), color)
+
+    def _put_text(self, frame, text, coords, color):
+        if self.tile_cache is None:
+            shapefunctions.write_text(frame,
+                                      text,
+                                      pos=coords,
+                                      font=self.font,
+                                      color=color,
+                                      scale=self.scale,
+                                      thickness=self.thickness,
+                                      ltype=self.ltype,
+                                      ref=None,
+                                      jtype='l'
+                                      )
+        else:
+            self.tile_cache.write(frame,
                                   text,
-                                  pos=coords,
-                                  font=self.font,
-                                  color=color,
+                                  coords,
+                                  self.font,
+                                  colortools.color_function(color),
                                   scale=self.scale,
                                   thickness=self.thickness,
                                   ltype=self.ltype,
-                                  ref=None,
-                                  jtype='l'
                                   )
 
     def write(self, frame, text: str = None, coords=None, color=None, ref=None, save=False):
@@ -374,7 +419,7 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
                                                        in_format=self.anchor_point + 'wh',
                                                        out_format='cwh',)
 
-        if self.one_border is True:
+        if self.one_border is True and self.cached_outline is False:
             if isinstance(self.background, bases.RectangleType):
                 self.background.write(frame, coords=center_coords, ref=None)
 
@@ -391,17 +436,9 @@ class TextWriter(bases.AssetWriter, bases.RectangleType, bases.TextType):
 
         x, y = start_coords[:2]
 
+        j_offsets = self.text_object.offsets(self.jtype)
         for i, stub in enumerate(self.stubs):
-            # this has to just keep running the ref stuff otherwise the justifications don't work
-            # I think
-            if self.jtype == 'c_spirals':
-                j_offset = (self.text_object.width - self.get_text_size(stub)[0]) // 2
-            elif self.jtype == 'radius':
-                j_offset = (self.text_object.width - self.get_text_size(stub)[0])
-            else:
-                j_offset = 0
-
-            self._write_line_of_text(frame, stub, (x + j_offset, y + i * down_space), _color,
+            self._write_line_of_text(frame, stub, (x + j_offsets[i], y + i * down_space), _color,
                                      show_outline=(not self.one_border))
 
     def write_fun(self, frame, *args, **kwargs):
@@ -11,6 +11,7 @@ import otis.helpers.maths
 from otis.helpers import timers, colortools, dstructures, coordtools, misc, cvtools
 
 from otis.overlay import bases, shapes, textwriters
+from otis.overlay.textwriters import texttiles
 
 # something is happening when moving the transparent background
 class TypeWriter(textwriters.TextWriter):
@@ -50,6 +51,7 @@ class TypeWriter(textwriters.TextWriter):
                  b_color=None,
                  background=False,
                  back_color=False,
+                 incremental=True,
                  **kwargs
                  ):
         """
@@ -83,6 +85,9 @@ class TypeWriter(textwriters.TextWriter):
             end_pause:
             loop:
             perma_border:
+            incremental: bool
+                the line being typed is kept in an off-screen texttiles.LineBuffer and only the newly typed
+                characters get drawn into it, instead of re-rendering the whole line every frame
             **kwargs:
         """
 
@@ -137,6 +142,10 @@ class TypeWriter(textwriters.TextWriter):
         self.total_timer = timers.TimeSinceFirst(start=True)
         self.completed_stubs = []
 
+        self.incremental = incremental
+        self.line_buffer = None
+        self._buffered_stub = None
+
         self.text = text
         self.perma_border = perma_border
 
@@ -233,7 +242,7 @@ class TypeWriter(textwriters.TextWriter):
             self.text = self.text_object.text
 
         # always show background with perma border or preprint if one_border is True
-        if self.perma_border is True or self.one_border is True:
+        if (self.perma_border is True or self.one_border is True) and self.cached_outline is False:
             if isinstance(self.background, bases.RectangleType):
                 self.background.write(frame, coords=center_coords, ref=None)
             if isinstance(self.border, bases.RectangleType):
@@ -254,18 +263,48 @@ class TypeWriter(textwriters.TextWriter):
         # this just eneded up beign the simplest way to add typewriter functionality
         self.update_typing() # update the typing
         # write the already written stubs and portion of the current stub that's been typed out
-        for i, stub in enumerate(self.completed_stubs + [self._output + self.cursor()]):
-            # this has to just keep running the ref stuff otherwise the justifications don't work
-            # I think
-            if self.jtype == 'c_spirals':
-                j_offset = (self.text_object.width - self.get_text_size(stub)[0]) // 2
+        lines = self.completed_stubs + [self._output + self.cursor()]
+        j_offsets = self.text_object.offsets(self.jtype)
+        for i, stub in enumerate(lines):
+            line_buffer = None
+            if self.incremental is True and i == len(lines) - 1:
+                line_buffer = self._update_line_buffer()
+                text_size = (line_buffer.advances.width(stub), self.font_height)
+            else:
+                text_size = self.get_text_size(stub)
+
+            if i < len(lines) - 1:
+                # finished lines are already laid out
+                j_offset = j_offsets[i]
+            elif self.jtype == 'c_spirals':
+                j_offset = (self.text_object.width - text_size[0]) // 2
             elif self.jtype == 'radius':
-                j_offset = (self.text_object.width - self.get_text_size(stub)[0])
+                j_offset = (self.text_object.width - text_size[0])
             else:
                 j_offset = 0
 
             super()._write_line_of_text(frame, stub, (x + j_offset, y + i * down_space), self.color,
-                                        show_outline=(not self.one_border))
+                                        show_outline=(not self.one_border),
+                                        text_size=text_size,
+                                        line_buffer=line_buffer,
+                                        )
+
+    def _update_line_buffer(self):
+        """
+        draws any newly typed characters of the current stub into the line buffer
+        """
+        key = (self.font, self.scale, self.thickness, self.ltype)
+        if self.line_buffer is None or self.line_buffer.key != key:
+            self.line_buffer = texttiles.LineBuffer(*key)
+            self._buffered_stub = None
+
+        color = colortools.color_function(self.color)
+        # new line, so size the buffer for the whole thing once
+        if self._buffered_stub is not self.current_stub or not self._output.startswith(self.line_buffer.text):
+            self.line_buffer.reset(self.current_stub or '', color)
+            self._buffered_stub = self.current_stub
+
+        return self.line_buffer.update(self._output, color)
 
 if __name__ == '__main__':
 
@@ -1,5 +1,7 @@
+import cv2
+
 import otis.helpers
-from otis.helpers import timers
+from otis.helpers import timers, coordtools, colortools
 from otis.overlay.textwriters.textwriters import TextWriter
 from otis.overlay import shapes
 
@@ -178,3 +180,36 @@ class FPSWriter(TextWriter):
         self.clock = timers.TimeSinceLast()
         self.clock()
         self.text_fun = lambda: f'FPS = {int(1 / self.clock())}'
+
+
+class StageTimerWriter(TextWriter):
+
+    def __init__(self, stage_timer, stages=None, spacing=30, *args, **kwargs):
+        """
+        writes the p50 / p95 / p99 in milliseconds of each stage of a timers.StageTimer, one stage per line. the
+        lines go on with plain cv2.putText, so borders and backgrounds aren't drawn
+        Args:
+            stage_timer: timers.StageTimer
+            stages: list of str, optional
+                stages to show. defaults to all of them
+            spacing: int
+                pixels between lines
+        """
+        super().__init__(*args, **kwargs)
+        self.stage_timer = stage_timer
+        self.stages = stages
+        self.spacing = spacing
+
+    def write(self, frame, *args, **kwargs):
+        # the numbers are different nearly every frame, so going through TextWriter.write would fill TEXT_LAYOUTS,
+        # TEXT_METRICS and TEXT_TILES with lines that are never drawn again and push out the ones that are. they go
+        # straight on with cv2.putText instead, in the same place TextWriter.write would put them
+        stages = self.stage_timer.stages if self.stages is None else self.stages
+        x, y = coordtools.absolute_point(self.coords, self.ref, frame)
+        x, y = int(x + self.border_spacing[0]), int(y - self.border_spacing[1])
+        color = colortools.color_function(self.color)
+        for i, stage in enumerate(stages):
+            histogram = self.stage_timer[stage]
+            text = f'{stage} : {histogram.p50 * 1000:.1f} / {histogram.p95 * 1000:.1f} / {histogram.p99 * 1000:.1f} ms'
+            cv2.putText(frame, text, (x, y + i * self.spacing), self.font, self.scale, color, self.thickness,
+                        self.ltype)
@@ -64,7 +64,7 @@ def main():
                                     copy_asset=True
                                     )
 
-    mover_manager = assetholders.CollidingAssetManager(collisions=True, move_before_delete=100)
+    mover_manager = assetholders.CollidingAssetManager(collisions=True)
     mover.name = '0'
 
     mover_manager.movers.append(mover)